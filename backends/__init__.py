@@ -0,0 +1,30 @@
+from core.engine.actions import NewPartitions
+from core.engine.views import ListPartitions
+
+DISCOVER_CHUNK_SIZE = 1000
+
+
+def register_partitions(cursor, hub_id, dataset_id, version, partitions):
+    registered = ListPartitions(hub_id, dataset_id, version).fetch(cursor)['partitions']
+    registered_paths = {partition['path'] for partition in registered}
+    registered_values = {tuple(partition['partition_values']) for partition in registered}
+
+    new_count = 0
+    new_partitions = []
+    for partition in partitions:
+        if partition['path'] in registered_paths or tuple(partition['values']) in registered_values:
+            continue
+
+        new_partitions.append((partition['path'], partition['values'], None, None, None))
+        if len(new_partitions) >= DISCOVER_CHUNK_SIZE:
+            NewPartitions(hub_id, dataset_id, version, new_partitions).execute(cursor)
+            new_count += len(new_partitions)
+            new_partitions = []
+
+    NewPartitions(hub_id, dataset_id, version, new_partitions).execute(cursor)
+    new_count += len(new_partitions)
+
+    return {
+        'existing': len(registered),
+        'new': new_count,
+    }
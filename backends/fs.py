@@ -1,10 +1,29 @@
+import collections as cl
+import concurrent.futures as cf
+import os
 import pathlib
+import queue
+import threading
+import time
 
+from backends import DISCOVER_CHUNK_SIZE, register_partitions
 from core.data import Status
 from core.engine import logging
-from core.engine.actions import NewPartition, UpdatePartitionStatus
-from core.engine.assertions import PartitionPathExists
-from core.engine.views import ListPartitions, SimpleDetailVersion
+from core.engine.actions import ReplaceDiscoveryCheckpoints, UpdatePartitionStats, UpdatePartitionStatuses
+from core.engine.views import ListDiscoveryCheckpoints, ListPartitions, SimpleDetailVersion
+
+try:
+    import pyarrow.parquet as parquet
+except ImportError:
+    parquet = None
+
+VERIFY_CONCURRENCY = 32
+WALK_CONCURRENCY = 8
+READ_BLOCK_SIZE = 1024 * 1024
+
+# Coarse enough for NFS, ext3 and FAT, which store mtimes at one or two second resolution
+MTIME_GRANULARITY_NS = 2 * 10 ** 9
+FORCE_RESCAN = -1
 
 
 def __directory_exists(path):
@@ -13,46 +32,186 @@ def __directory_exists(path):
     return path.exists() and path.is_dir()
 
 
-def verify_partitions(cursor, hub_id, dataset_id, version):
+def __count_rows(path):
+    if path.endswith('.parquet') and parquet is not None:
+        return parquet.ParquetFile(path).metadata.num_rows
+    if path.endswith('.csv'):
+        lines, last_block = 0, b''
+        with open(path, 'rb') as fh:
+            for block in iter(lambda: fh.read(READ_BLOCK_SIZE), b''):
+                lines += block.count(b'\n')
+                last_block = block
+        if last_block and not last_block.endswith(b'\n'):
+            lines += 1
+        return max(lines - 1, 0)
+    return None
+
+
+def __partition_stats(path, count_rows):
+    byte_count, file_count = 0, 0
+    row_count = 0 if count_rows else None
+
+    directories = [path]
+    while directories:
+        with os.scandir(directories.pop()) as entries:
+            for entry in entries:
+                if entry.name.startswith(('.', '_')):
+                    continue
+                if entry.is_dir():
+                    directories.append(entry.path)
+                elif entry.is_file():
+                    byte_count += entry.stat().st_size
+                    file_count += 1
+                    if row_count is not None:
+                        file_rows = __count_rows(entry.path)
+                        row_count = None if file_rows is None else row_count + file_rows
+
+    return byte_count, file_count, row_count
+
+
+def __verify_partition(path, count_rows):
+    if not __directory_exists(path):
+        return Status.ERROR, None
+    return Status.OK, __partition_stats(path, count_rows)
+
+
+def verify_partitions(cursor, hub_id, dataset_id, version, count_rows=False):
     partitions = ListPartitions(hub_id, dataset_id, version).fetch(cursor)['partitions']
-    for partition in partitions:
-        status = Status.OK if __directory_exists(partition['path']) else Status.ERROR
-        logging.info('partition_status', partition_id=partition['id'], status=status, path=partition['path'])
-        UpdatePartitionStatus(partition['id'], status).execute(cursor)
+
+    with cf.ThreadPoolExecutor(max_workers=VERIFY_CONCURRENCY) as executor:
+        verified = list(executor.map(lambda partition: __verify_partition(partition['path'], count_rows),
+                                     partitions))
+
+    statuses = [(partition['id'], status) for partition, (status, _) in zip(partitions, verified)]
+    stats = [(partition['id'], *stats) for partition, (_, stats) in zip(partitions, verified) if stats is not None]
+
+    for (partition, (_, status)) in zip(partitions, statuses):
+        if status == Status.ERROR:
+            logging.warn('partition_status', partition_id=partition['id'], status=status, path=partition['path'])
+
+    logging.info('verified_partitions',
+                 hub_id=hub_id,
+                 dataset_id=dataset_id,
+                 version=version,
+                 ok=sum(1 for (_, status) in statuses if status == Status.OK),
+                 error=sum(1 for (_, status) in statuses if status == Status.ERROR))
+    UpdatePartitionStatuses(statuses).execute(cursor)
+    UpdatePartitionStats(stats).execute(cursor)
+
+
+def __scan_directories(directory):
+    with os.scandir(directory) as entries:
+        return [entry.path
+                for entry in entries
+                if not entry.name.startswith(('.', '_')) and entry.is_dir()]
 
 
-def __find_nested_partitions(directory, keys, values):
+def __list_children(directory, keys, checkpoint, known_children, visited):
+    mtime_ns = os.stat(directory).st_mtime_ns
+    visited[directory] = mtime_ns
+
+    if checkpoint.get(directory) != mtime_ns:
+        return __scan_directories(directory)
+    if len(keys) == 1:
+        return []
+    return [child_dir for child_dir in known_children[directory] if os.path.isdir(child_dir)]
+
+
+def __partition_value(directory, key):
+    name = os.path.basename(directory)
+    dir_key, separator, value = name.partition('=')
+    if dir_key != key or not separator:
+        raise ValueError(f'Key "{key}" does not match on disk folder "{name}"')
+    return value
+
+
+def __find_nested_partitions(directory, keys, values, checkpoint, known_children, visited):
     if not keys:
         yield {
             'path': directory,
             'values': values,
         }
+        return
 
-    for child_dir in directory.iterdir():
-        dir_kv = child_dir.name.split('=')
-        if dir_kv[0] != keys[0]:
-            raise ValueError(f'Key "{keys[0]}" does not match on disk folder "{dir_kv[0]}"')
-
-        for partition in __find_nested_partitions(child_dir, keys[1:], values + [dir_kv[1]]):
+    for child_dir in __list_children(directory, keys, checkpoint, known_children, visited):
+        for partition in __find_nested_partitions(child_dir, keys[1:], values + [__partition_value(child_dir, keys[0])],
+                                                  checkpoint, known_children, visited):
             yield partition
 
 
-def discover_partitions(cursor, hub_id, dataset_id, version):
+def __stream_nested_partitions(directory, keys, checkpoint, known_children, visited):
+    if len(keys) < 2:
+        yield from __find_nested_partitions(directory, keys, [], checkpoint, known_children, visited)
+        return
+
+    results = queue.Queue(maxsize=DISCOVER_CHUNK_SIZE * WALK_CONCURRENCY)
+    stopped = threading.Event()
+
+    def walk(child_dir):
+        try:
+            for partition in __find_nested_partitions(child_dir, keys[1:], [__partition_value(child_dir, keys[0])],
+                                                      checkpoint, known_children, visited):
+                if stopped.is_set():
+                    return
+                results.put(partition)
+        finally:
+            results.put(None)
+
+    child_dirs = __list_children(directory, keys, checkpoint, known_children, visited)
+    with cf.ThreadPoolExecutor(max_workers=WALK_CONCURRENCY) as executor:
+        futures = [executor.submit(walk, child_dir) for child_dir in child_dirs]
+
+        remaining = len(futures)
+        try:
+            while remaining:
+                partition = results.get()
+                if partition is None:
+                    remaining -= 1
+                else:
+                    yield partition
+        finally:
+            stopped.set()
+            while remaining:
+                if results.get() is None:
+                    remaining -= 1
+
+        for future in futures:
+            future.result()
+
+
+def __checkpoints(visited, started_ns):
+    # A directory modified within one mtime tick of the walk may gain children without its mtime changing,
+    # so it is rescanned on the next run instead of trusted
+    return {
+        directory: FORCE_RESCAN if mtime_ns >= started_ns - MTIME_GRANULARITY_NS else mtime_ns
+        for directory, mtime_ns in visited.items()
+    }
+
+
+def discover_partitions(cursor, hub_id, dataset_id, version, full=False):
+    started_ns = time.time_ns()
     details = SimpleDetailVersion(hub_id, dataset_id, version).fetch(cursor)
-    path = pathlib.Path(details['path'])
+    path = os.path.normpath(details['path'])
     if not __directory_exists(path):
         raise ValueError(f'Path {details["path"]} does not exist')
 
-    for partition in __find_nested_partitions(path, details['partition_keys'], []):
-        exists = PartitionPathExists(hub_id, dataset_id, version, str(partition['path']), partition['values'])
-        if exists.check(cursor):
-            logging.warn('skip_existing_partition',
-                         hub_id=hub_id,
-                         dataset_id=dataset_id,
-                         version=version,
-                         path=partition['path'],
-                         values=partition['values'])
-        else:
-            NewPartition(hub_id, dataset_id, version,
-                         str(partition['path']), partition['values'],
-                         None, None, None).execute(cursor)
+    checkpoint = {}
+    if not full:
+        checkpoint = ListDiscoveryCheckpoints(hub_id, dataset_id, version).fetch(cursor)['checkpoints']
+
+    known_children = cl.defaultdict(list)
+    for directory in checkpoint:
+        known_children[os.path.dirname(directory)].append(directory)
+
+    visited = {}
+    partitions = __stream_nested_partitions(path, details['partition_keys'], checkpoint, known_children, visited)
+    counts = register_partitions(cursor, hub_id, dataset_id, version, partitions)
+
+    logging.info('discovered_partitions',
+                 hub_id=hub_id,
+                 dataset_id=dataset_id,
+                 version=version,
+                 listed=sum(1 for directory, mtime_ns in visited.items() if checkpoint.get(directory) != mtime_ns),
+                 unchanged=sum(1 for directory, mtime_ns in visited.items() if checkpoint.get(directory) == mtime_ns),
+                 **counts)
+    ReplaceDiscoveryCheckpoints(hub_id, dataset_id, version, __checkpoints(visited, started_ns)).execute(cursor)
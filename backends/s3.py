@@ -0,0 +1,154 @@
+import concurrent.futures as cf
+import itertools
+import os
+import urllib.parse
+
+import boto3
+
+from backends import register_partitions
+from core.data import Status
+from core.engine import logging
+from core.engine.actions import UpdatePartitionStats, UpdatePartitionStatuses
+from core.engine.views import ListPartitions, SimpleDetailVersion
+
+LIST_CONCURRENCY = 16
+
+
+def __client():
+    return boto3.client('s3', endpoint_url=os.environ.get('S3_ENDPOINT_URL'))
+
+
+def __split_path(path):
+    url = urllib.parse.urlparse(path)
+    if url.scheme != 's3' or not url.netloc:
+        raise ValueError(f'Path {path} is not an s3://bucket/prefix url')
+
+    prefix = url.path.lstrip('/')
+    if prefix and not prefix.endswith('/'):
+        prefix += '/'
+    return url.netloc, prefix
+
+
+def __join_path(bucket, prefix):
+    return f's3://{bucket}/{prefix.rstrip("/")}'
+
+
+def __parent_prefix(prefix):
+    parent = prefix.rstrip('/').rpartition('/')[0]
+    return parent + '/' if parent else ''
+
+
+def __list_prefixes(client, bucket, prefix):
+    paginator = client.get_paginator('list_objects_v2')
+    return [
+        common_prefix['Prefix']
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix, Delimiter='/')
+        for common_prefix in page.get('CommonPrefixes', [])
+    ]
+
+
+def __list_objects(client, bucket, prefix):
+    paginator = client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        yield from page.get('Contents', [])
+
+
+def __partition_value(prefix, key):
+    name = prefix.rstrip('/').rpartition('/')[2]
+    prefix_key, separator, value = name.partition('=')
+    if prefix_key != key or not separator:
+        raise ValueError(f'Key "{key}" does not match on S3 prefix "{name}"')
+    return value
+
+
+def __list_children(client, bucket, level):
+    prefix, values, key = level
+    return [
+        (child_prefix, values + [__partition_value(child_prefix, key)])
+        for child_prefix in __list_prefixes(client, bucket, prefix)
+        if not child_prefix.rstrip('/').rpartition('/')[2].startswith(('.', '_'))
+    ]
+
+
+def __find_nested_partitions(client, bucket, prefix, keys):
+    levels = [(prefix, [])]
+
+    with cf.ThreadPoolExecutor(max_workers=LIST_CONCURRENCY) as executor:
+        for depth, key in enumerate(keys):
+            children = executor.map(lambda level: __list_children(client, bucket, level),
+                                    [(level_prefix, values, key) for (level_prefix, values) in levels])
+            levels = itertools.chain.from_iterable(children)
+            if depth < len(keys) - 1:
+                levels = list(levels)
+
+        for (partition_prefix, values) in levels:
+            yield {
+                'path': __join_path(bucket, partition_prefix),
+                'values': values,
+            }
+
+
+def verify_partitions(cursor, hub_id, dataset_id, version, count_rows=False):
+    partitions = ListPartitions(hub_id, dataset_id, version).fetch(cursor)['partitions']
+    client = __client()
+
+    parents, invalid = {}, []
+    for partition in partitions:
+        try:
+            bucket, prefix = __split_path(partition['path'])
+        except ValueError:
+            invalid.append((partition, Status.ERROR, None))
+            continue
+        parents.setdefault((bucket, __parent_prefix(prefix)), []).append((partition, prefix))
+
+    def verify_parent(parent):
+        (bucket, parent_prefix), children = parent
+
+        stats = {}
+        for s3_object in __list_objects(client, bucket, parent_prefix):
+            child_name, _, rest = s3_object['Key'][len(parent_prefix):].partition('/')
+            child_prefix = parent_prefix + child_name + '/'
+
+            byte_count, file_count = stats.get(child_prefix, (0, 0))
+            if not any(part.startswith(('.', '_')) for part in rest.split('/')):
+                byte_count, file_count = byte_count + s3_object['Size'], file_count + 1
+            stats[child_prefix] = (byte_count, file_count)
+
+        return [
+            (partition, Status.OK, (*stats[prefix], None)) if prefix in stats else (partition, Status.ERROR, None)
+            for (partition, prefix) in children
+        ]
+
+    with cf.ThreadPoolExecutor(max_workers=LIST_CONCURRENCY) as executor:
+        verified = invalid + list(itertools.chain.from_iterable(executor.map(verify_parent, parents.items())))
+
+    for (partition, status, _) in verified:
+        if status == Status.ERROR:
+            logging.warn('partition_status', partition_id=partition['id'], status=status, path=partition['path'])
+
+    logging.info('verified_partitions',
+                 hub_id=hub_id,
+                 dataset_id=dataset_id,
+                 version=version,
+                 ok=sum(1 for (_, status, _) in verified if status == Status.OK),
+                 error=sum(1 for (_, status, _) in verified if status == Status.ERROR))
+    UpdatePartitionStatuses([(partition['id'], status) for (partition, status, _) in verified]).execute(cursor)
+    UpdatePartitionStats([
+        (partition['id'], *stats)
+        for (partition, _, stats) in verified
+        if stats is not None
+    ]).execute(cursor)
+
+
+def discover_partitions(cursor, hub_id, dataset_id, version, full=False):
+    details = SimpleDetailVersion(hub_id, dataset_id, version).fetch(cursor)
+    bucket, prefix = __split_path(details['path'])
+
+    partitions = __find_nested_partitions(__client(), bucket, prefix, details['partition_keys'])
+    counts = register_partitions(cursor, hub_id, dataset_id, version, partitions)
+
+    logging.info('discovered_partitions',
+                 hub_id=hub_id,
+                 dataset_id=dataset_id,
+                 version=version,
+                 **counts)
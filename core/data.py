@@ -2,11 +2,15 @@ import abc
 import dataclasses as dc
 import datetime as dt
 import enum
+import itertools
 import json
 import pathlib as pl
 import typing as t
 import uuid
 
+import psycopg2 as psql
+import psycopg2.extras
+
 
 class AccessLevel(enum.Enum):
     ADMIN = 'admin'
@@ -46,39 +50,64 @@ class Status(enum.Enum):
 
 
 class Entry(abc.ABC):
+    __slots__ = ()
+
     table_name:   str
     primary_keys: t.Tuple[str]
 
     @property
     def columns(self):
-        return [field.name for field in dc.fields(self)]
+        return self._columns
 
     @property
     def values(self):
         def get_value(column):
-            value = self.__getattribute__(column)
+            value = getattr(self, column)
             if isinstance(value, dict):
                 return json.dumps(value)
             return value
 
-        return [get_value(column) for column in self.columns]
+        return [get_value(column) for column in self._columns]
 
     @property
     def secondary_columns(self):
-        return [column
-                for column in self.columns
-                if column not in self.primary_keys]
+        return self._secondary_columns
 
     @property
     def secondary_values(self):
-        indexes = [idx
-                   for idx, column in enumerate(self.columns)
-                   if column not in self.primary_keys]
-        return [value
-                for idx, value in enumerate(self.values)
-                if idx in indexes]
-
-@dc.dataclass
+        values = self.values
+        return [values[idx] for idx in self._secondary_indexes]
+
+
+def entry(cls):
+    cls = dc.dataclass(cls)
+    columns = tuple(field.name for field in dc.fields(cls))
+
+    namespace = dict(cls.__dict__)
+    namespace.pop('__dict__', None)
+    namespace.pop('__weakref__', None)
+    namespace['__slots__'] = columns
+    cls = type(cls)(cls.__name__, cls.__bases__, namespace)
+
+    cls._columns = columns
+    cls._secondary_indexes = tuple(idx
+                                   for idx, column in enumerate(columns)
+                                   if column not in cls.primary_keys)
+    cls._secondary_columns = tuple(columns[idx] for idx in cls._secondary_indexes)
+
+    insert = f'INSERT INTO {cls.table_name} ({", ".join(columns)}) '
+    on_conflict = (f'ON CONFLICT ({", ".join(cls.primary_keys)}) '
+                   f'DO UPDATE ')
+    cls._insert_sql = insert + f'VALUES ({", ".join(["%s" for _ in columns])})'
+    cls._upsert_sql = (cls._insert_sql + ' ' + on_conflict +
+                       f'SET {", ".join([col + "=%s" for col in cls._secondary_columns])}')
+    cls._insert_many_sql = insert + 'VALUES %s'
+    cls._upsert_many_sql = (cls._insert_many_sql + ' ' + on_conflict +
+                            f'SET {", ".join([col + "=EXCLUDED." + col for col in cls._secondary_columns])}')
+    return cls
+
+
+@entry
 class User(Entry):
     id: uuid.UUID
 
@@ -90,7 +119,7 @@ class User(Entry):
     primary_keys = ('id', )
 
 
-@dc.dataclass
+@entry
 class Team(Entry):
     id: uuid.UUID
 
@@ -101,7 +130,7 @@ class Team(Entry):
     primary_keys = ('id', )
 
 
-@dc.dataclass
+@entry
 class TeamMember(Entry):
     id: uuid.UUID
 
@@ -114,7 +143,18 @@ class TeamMember(Entry):
     primary_keys = ('id', )
 
 
-@dc.dataclass
+@entry
+class CurrentTeamMember(Entry):
+    team_id: uuid.UUID
+    user_id: uuid.UUID
+
+    created_at: dt.datetime
+
+    table_name = 'current_team_members'
+    primary_keys = ('team_id', 'user_id')
+
+
+@entry
 class Hub(Entry):
     id: uuid.UUID
 
@@ -126,7 +166,7 @@ class Hub(Entry):
     primary_keys = ('id', )
 
 
-@dc.dataclass
+@entry
 class TeamRole(Entry):
     id: uuid.UUID
 
@@ -139,7 +179,19 @@ class TeamRole(Entry):
     primary_keys = ('id', )
 
 
-@dc.dataclass
+@entry
+class CurrentTeamRole(Entry):
+    team_id: uuid.UUID
+    hub_id:  uuid.UUID
+
+    access_level: str
+    created_at:   dt.datetime
+
+    table_name = 'current_team_roles'
+    primary_keys = ('team_id', 'hub_id')
+
+
+@entry
 class Dataset(Entry):
     hub_id: uuid.UUID
     id:     uuid.UUID
@@ -152,7 +204,7 @@ class Dataset(Entry):
     primary_keys = ('hub_id', 'id')
 
 
-@dc.dataclass
+@entry
 class Backend(Entry):
     id: int
 
@@ -178,7 +230,7 @@ Backends = [
 ]
 
 
-@dc.dataclass
+@entry
 class DatasetVersion(Entry):
     hub_id:     uuid.UUID
     dataset_id: uuid.UUID
@@ -195,7 +247,7 @@ class DatasetVersion(Entry):
     primary_keys = ('hub_id', 'dataset_id', 'version')
 
 
-@dc.dataclass
+@entry
 class Dependency(Entry):
     parent_hub_id:     uuid.UUID
     parent_dataset_id: uuid.UUID
@@ -211,7 +263,7 @@ class Dependency(Entry):
     )
 
 
-@dc.dataclass
+@entry
 class PublishedVersion(Entry):
     hub_id:     uuid.UUID
     dataset_id: uuid.UUID
@@ -223,7 +275,19 @@ class PublishedVersion(Entry):
     primary_keys = ('hub_id', 'dataset_id', 'version')
 
 
-@dc.dataclass
+@entry
+class CurrentPublishedVersion(Entry):
+    hub_id:     uuid.UUID
+    dataset_id: uuid.UUID
+
+    version:      int
+    published_at: dt.datetime
+
+    table_name = 'current_published_versions'
+    primary_keys = ('hub_id', 'dataset_id')
+
+
+@entry
 class Type(Entry):
     id: int
 
@@ -251,7 +315,7 @@ Types = [
 ]
 
 
-@dc.dataclass
+@entry
 class Column(Entry):
     hub_id:     uuid.UUID
     dataset_id: uuid.UUID
@@ -269,7 +333,7 @@ class Column(Entry):
     primary_keys = ('hub_id', 'dataset_id', 'version', 'name')
 
 
-@dc.dataclass
+@entry
 class Partition(Entry):
     id: uuid.UUID
 
@@ -279,6 +343,8 @@ class Partition(Entry):
     path:             pl.Path
     partition_values: t.List[str]
     row_count:        t.Optional[int]
+    byte_count:       t.Optional[int]
+    file_count:       t.Optional[int]
     start_time:       t.Optional[dt.datetime]
     end_time:         t.Optional[dt.datetime]
     created_at:       dt.datetime
@@ -288,7 +354,7 @@ class Partition(Entry):
     primary_keys = ('id', )
 
 
-@dc.dataclass
+@entry
 class PartitionStatus(Entry):
     partition_id: uuid.UUID
 
@@ -299,7 +365,21 @@ class PartitionStatus(Entry):
     primary_keys = ('partition_id', )
 
 
-@dc.dataclass
+@entry
+class DiscoveryCheckpoint(Entry):
+    hub_id:     uuid.UUID
+    dataset_id: uuid.UUID
+    version:    int
+    path:       str
+
+    mtime_ns:   int
+    updated_at: dt.datetime
+
+    table_name = 'discovery_checkpoints'
+    primary_keys = ('hub_id', 'dataset_id', 'version', 'path')
+
+
+@entry
 class Connector(Entry):
     id: int
 
@@ -333,7 +413,7 @@ Connectors = [
 ]
 
 
-@dc.dataclass
+@entry
 class Connection(Entry):
     id: uuid.UUID
 
@@ -348,17 +428,30 @@ class Connection(Entry):
 
 
 def write(cursor, entry):
-    cursor.execute(f'INSERT INTO {entry.table_name} '
-                   f'({", ".join(entry.columns)}) '
-                   f'VALUES ({", ".join(["%s" for _ in entry.columns])})',
-                   entry.values)
+    cursor.execute(entry._insert_sql, entry.values)
+
+
+def write_many(cursor, entries, page_size=1000, skip_conflicts=False):
+    written = []
+    for kind, group in itertools.groupby(entries, key=type):
+        sql = kind._insert_many_sql
+        if skip_conflicts:
+            sql += f' ON CONFLICT DO NOTHING RETURNING {", ".join(kind.primary_keys)}'
+        written.extend(psql.extras.execute_values(cursor,
+                                                  sql,
+                                                  [entry.values for entry in group],
+                                                  page_size=page_size,
+                                                  fetch=skip_conflicts) or [])
+    return written
 
 
 def upsert(cursor, entry):
-    cursor.execute(f'INSERT INTO {entry.table_name} '
-                   f'({", ".join(entry.columns)}) '
-                   f'VALUES ({", ".join(["%s" for _ in entry.columns])}) '
-                   f'ON CONFLICT ({", ".join(entry.primary_keys)}) '
-                   f'DO UPDATE '
-                   f'SET {", ".join([col + "=%s" for col in entry.secondary_columns])}',
-                   entry.values + entry.secondary_values)
+    cursor.execute(entry._upsert_sql, entry.values + entry.secondary_values)
+
+
+def upsert_many(cursor, entries, page_size=1000):
+    for kind, group in itertools.groupby(entries, key=type):
+        psql.extras.execute_values(cursor,
+                                   kind._upsert_many_sql,
+                                   [entry.values for entry in group],
+                                   page_size=page_size)
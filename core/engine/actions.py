@@ -5,19 +5,45 @@ import pathlib as pl
 import uuid
 import typing as t
 
+import psycopg2 as psql
+import psycopg2.extras
 import pytz
 
-from core.data import AccessLevel, Backend, Column, Connection, Dataset, DatasetVersion, Dependency, Hub, \
-    Partition, PartitionStatus, PublishedVersion, Status, Team, TeamMember, TeamRole, Type, User, \
-    write, upsert
-from core.engine import logging, security
+from core.data import AccessLevel, Backend, Column, Connection, CurrentPublishedVersion, CurrentTeamMember, \
+    CurrentTeamRole, Dataset, DatasetVersion, Dependency, DiscoveryCheckpoint, Hub, Partition, PartitionStatus, \
+    PublishedVersion, Status, Team, TeamMember, TeamRole, Type, User, \
+    write, write_many, upsert, upsert_many
+from core.engine import cache, logging, security
+
+
+def partition_scopes(cursor, partition_ids):
+    cursor.execute('''
+        SELECT DISTINCT dataset_id
+        FROM partitions
+        WHERE id = ANY(%s)
+    ''', (list(partition_ids), ))
+    return [cache.dataset_scope(row[0]) for row in cursor.fetchall()]
+
+
+def team_roles_scopes(cursor, team_id):
+    cursor.execute('''
+        SELECT user_id
+        FROM current_team_members
+        WHERE team_id = %s
+    ''', (team_id, ))
+    return [cache.roles_scope(row[0]) for row in cursor.fetchall()]
 
 
 class Action(abc.ABC):
 
     def execute(self, cursor):
         logging.info(f'execute_{self.__class__.__name__}', **self.__dict__)
-        return self._execute(cursor)
+        result = self._execute(cursor)
+        cache.defer_bump(cursor, self.cache_scopes(cursor))
+        return result
+
+    def cache_scopes(self, cursor):
+        return []
 
     @abc.abstractmethod
     def _execute(self, cursor):
@@ -29,17 +55,36 @@ class NewUser(Action):
     email:    str
     password: str
 
+    def cache_scopes(self, cursor):
+        return ['users']
+
     def _execute(self, cursor):
         user_id = uuid.uuid4()
-        password_hash = security.pwd_context.hash(self.password)
+        password_hash = security.hash_password(self.password)
         write(cursor, User(user_id, self.email, password_hash, dt.datetime.now(tz=pytz.utc)))
         return user_id
 
 
+@dc.dataclass
+class UpdatePasswordHash(Action):
+    email:         str
+    password_hash: str
+
+    def _execute(self, cursor):
+        cursor.execute('''
+            UPDATE users
+            SET password_hash = %s
+            WHERE email = %s
+        ''', (self.password_hash, self.email))
+
+
 @dc.dataclass
 class NewTeam(Action):
     name: str
 
+    def cache_scopes(self, cursor):
+        return ['teams']
+
     def _execute(self, cursor):
         team_id = uuid.uuid4()
         write(cursor, Team(team_id, self.name, dt.datetime.now(tz=pytz.utc)))
@@ -51,9 +96,16 @@ class NewTeamMember(Action):
     team_id: uuid.UUID
     user_id: uuid.UUID
 
+    def cache_scopes(self, cursor):
+        return ['teams', cache.roles_scope(self.user_id)]
+
     def _execute(self, cursor):
+        created_at = dt.datetime.now(tz=pytz.utc)
+
         member_id = uuid.uuid4()
-        write(cursor, TeamMember(member_id, self.team_id, self.user_id, dt.datetime.now(tz=pytz.utc), None))
+        write(cursor, TeamMember(member_id, self.team_id, self.user_id, created_at, None))
+        upsert(cursor, CurrentTeamMember(self.team_id, self.user_id, created_at))
+
         return member_id
 
 
@@ -62,6 +114,9 @@ class NewHub(Action):
     team_id: uuid.UUID
     name:    str
 
+    def cache_scopes(self, cursor):
+        return ['hubs', 'teams'] + team_roles_scopes(cursor, self.team_id)
+
     def _execute(self, cursor):
         created_at = dt.datetime.now(tz=pytz.utc)
 
@@ -70,6 +125,7 @@ class NewHub(Action):
 
         team_role_id = uuid.uuid4()
         write(cursor, TeamRole(team_role_id, self.team_id, hub_id, AccessLevel.ADMIN.value, created_at))
+        upsert(cursor, CurrentTeamRole(self.team_id, hub_id, AccessLevel.ADMIN.value, created_at))
 
         return hub_id
 
@@ -79,6 +135,9 @@ class NewDataset(Action):
     hub_id: uuid.UUID
     name:   str
 
+    def cache_scopes(self, cursor):
+        return [cache.hub_scope(self.hub_id)]
+
     def _execute(self, cursor):
         dataset_id = uuid.uuid4()
         write(cursor, Dataset(self.hub_id, dataset_id, self.name, dt.datetime.now(tz=pytz.utc), None))
@@ -97,6 +156,29 @@ class NewDatasetVersion(Action):
     columns:        t.List[t.Tuple[str, str, str, bool, bool, bool]]
     depends_on:     t.List[t.Tuple[str, str, int]]
 
+    def cache_scopes(self, cursor):
+        if not self.depends_on:
+            return [cache.dataset_scope(self.dataset_id)]
+
+        # Ancestors render this version in their downstream lineage
+        cursor.execute('''
+            SELECT par.dataset_id
+            FROM unnest(%s::uuid[], %s::uuid[], %s::int[]) AS par(hub_id, dataset_id, version)
+            UNION
+            SELECT clo.ancestor_dataset_id
+            FROM
+                unnest(%s::uuid[], %s::uuid[], %s::int[]) AS par(hub_id, dataset_id, version)
+            INNER JOIN
+                dependency_closure clo
+            ON
+                clo.descendant_hub_id = par.hub_id
+            AND clo.descendant_dataset_id = par.dataset_id
+            AND clo.descendant_version = par.version
+        ''', ([str(hub_id) for hub_id, _, _ in self.depends_on],
+              [str(dataset_id) for _, dataset_id, _ in self.depends_on],
+              [version for _, _, version in self.depends_on]) * 2)
+        return [cache.dataset_scope(self.dataset_id), *(cache.dataset_scope(row[0]) for row in cursor.fetchall())]
+
     def _execute(self, cursor):
         cursor.execute('''
             SELECT max(version)
@@ -117,28 +199,73 @@ class NewDatasetVersion(Action):
                                      self.is_overlapping,
                                      dt.datetime.now(tz=pytz.utc)))
 
-        position = 0
-        for column in self.columns:
-            name, type_name, description, is_nullable, is_unique, has_pii = column
-            write(cursor, Column(self.hub_id,
-                                 self.dataset_id,
-                                 latest_version + 1,
-                                 name,
-                                 Type.by_name(type_name).id,
-                                 position,
-                                 description,
-                                 is_nullable,
-                                 is_unique,
-                                 has_pii))
-            position += 1
-
-        for (parent_hub_id, parent_dataset_id, parent_version) in self.depends_on:
-            write(cursor, Dependency(parent_hub_id,
-                                     parent_dataset_id,
-                                     parent_version,
-                                     self.hub_id,
-                                     self.dataset_id,
-                                     latest_version + 1))
+        write_many(cursor, [
+            Column(self.hub_id,
+                   self.dataset_id,
+                   latest_version + 1,
+                   name,
+                   Type.by_name(type_name).id,
+                   position,
+                   description,
+                   is_nullable,
+                   is_unique,
+                   has_pii)
+            for position, (name, type_name, description, is_nullable, is_unique, has_pii) in enumerate(self.columns)
+        ])
+
+        write_many(cursor, [
+            Dependency(parent_hub_id,
+                       parent_dataset_id,
+                       parent_version,
+                       self.hub_id,
+                       self.dataset_id,
+                       latest_version + 1)
+            for (parent_hub_id, parent_dataset_id, parent_version) in self.depends_on
+        ])
+
+        if self.depends_on:
+            cursor.execute('''
+                INSERT INTO dependency_closure
+                SELECT
+                    ancestor_hub_id,
+                    ancestor_dataset_id,
+                    ancestor_version,
+                    %s,
+                    %s,
+                    %s,
+                    min(depth)
+                FROM (
+                    SELECT
+                        parent_hub_id AS ancestor_hub_id,
+                        parent_dataset_id AS ancestor_dataset_id,
+                        parent_version AS ancestor_version,
+                        1 AS depth
+                    FROM dependencies
+                    WHERE
+                        child_hub_id = %s
+                    AND child_dataset_id = %s
+                    AND child_version = %s
+                    UNION ALL
+                    SELECT
+                        clo.ancestor_hub_id,
+                        clo.ancestor_dataset_id,
+                        clo.ancestor_version,
+                        clo.depth + 1
+                    FROM
+                        dependencies dep
+                    INNER JOIN
+                        dependency_closure clo
+                    ON
+                        dep.parent_hub_id = clo.descendant_hub_id
+                    AND dep.parent_dataset_id = clo.descendant_dataset_id
+                    AND dep.parent_version = clo.descendant_version
+                    WHERE
+                        dep.child_hub_id = %s
+                    AND dep.child_dataset_id = %s
+                    AND dep.child_version = %s
+                ) AS anc
+                GROUP BY ancestor_hub_id, ancestor_dataset_id, ancestor_version
+            ''', (self.hub_id, self.dataset_id, latest_version + 1) * 3)
 
         return latest_version + 1
 
@@ -154,6 +281,9 @@ class NewPartition(Action):
     start_time: t.Optional[dt.datetime]
     end_time:   t.Optional[dt.datetime]
 
+    def cache_scopes(self, cursor):
+        return [cache.dataset_scope(self.dataset_id)]
+
     def _execute(self, cursor):
         partition_id = uuid.uuid4()
         write(cursor, Partition(partition_id,
@@ -163,6 +293,8 @@ class NewPartition(Action):
                                 self.path,
                                 self.values,
                                 self.row_count,
+                                None,
+                                None,
                                 self.start_time,
                                 self.end_time,
                                 dt.datetime.now(tz=pytz.utc),
@@ -170,6 +302,76 @@ class NewPartition(Action):
         return partition_id
 
 
+@dc.dataclass
+class NewPartitions(Action):
+    hub_id:     uuid.UUID
+    dataset_id: uuid.UUID
+    version:    int
+    partitions: t.List[t.Tuple[str, t.List[str], t.Optional[int], t.Optional[dt.datetime], t.Optional[dt.datetime]]]
+
+    def cache_scopes(self, cursor):
+        return [cache.dataset_scope(self.dataset_id)]
+
+    def _execute(self, cursor):
+        created_at = dt.datetime.now(tz=pytz.utc)
+        entries = [
+            Partition(uuid.uuid4(),
+                      self.hub_id,
+                      self.dataset_id,
+                      self.version,
+                      path,
+                      values,
+                      row_count,
+                      None,
+                      None,
+                      start_time,
+                      end_time,
+                      created_at,
+                      None)
+            for (path, values, row_count, start_time, end_time) in self.partitions
+        ]
+        written = {row[0] for row in write_many(cursor, entries, skip_conflicts=True)}
+        conflicts = self.__find_conflicts(cursor, [entry for entry in entries if entry.id not in written])
+
+        return [
+            {'partition_id': entry.id} if entry.id in written else {
+                'path': entry.path,
+                'partition_values': entry.partition_values,
+                'conflict': conflicts[entry.id],
+            }
+            for entry in entries
+        ]
+
+    def __find_conflicts(self, cursor, entries):
+        if not entries:
+            return {}
+
+        cursor.execute('''
+            SELECT path, partition_values
+            FROM partitions
+            WHERE
+                hub_id = %s
+            AND dataset_id = %s
+            AND version = %s
+            AND deleted_at IS NULL
+            AND (path = ANY(%s) OR partition_values IN %s)
+        ''', (self.hub_id, self.dataset_id, self.version,
+              [entry.path for entry in entries],
+              tuple(entry.partition_values for entry in entries)))
+        rows = cursor.fetchall()
+        paths = {row[0] for row in rows}
+        values = {tuple(row[1]) for row in rows}
+
+        def constraint(entry):
+            if entry.path in paths:
+                return 'current_partition_paths_idx'
+            if tuple(entry.partition_values) in values:
+                return 'current_partition_values_idx'
+            return 'partitions_pkey'
+
+        return {entry.id: constraint(entry) for entry in entries}
+
+
 @dc.dataclass
 class NewConnection(Action):
     hub_id:       uuid.UUID
@@ -177,6 +379,9 @@ class NewConnection(Action):
     connector_id: uuid.UUID
     path:         str
 
+    def cache_scopes(self, cursor):
+        return [cache.dataset_scope(self.dataset_id)]
+
     def _execute(self, cursor):
         connection_id = uuid.uuid4()
         write(cursor, Connection(connection_id,
@@ -194,11 +399,19 @@ class PublishVersion(Action):
     dataset_id: uuid.UUID
     version:    int
 
+    def cache_scopes(self, cursor):
+        return ['published', cache.hub_scope(self.hub_id), cache.dataset_scope(self.dataset_id)]
+
     def _execute(self, cursor):
+        published_at = dt.datetime.now(tz=pytz.utc)
         write(cursor, PublishedVersion(self.hub_id,
                                        self.dataset_id,
                                        self.version,
-                                       dt.datetime.now(tz=pytz.utc)))
+                                       published_at))
+        upsert(cursor, CurrentPublishedVersion(self.hub_id,
+                                               self.dataset_id,
+                                               self.version,
+                                               published_at))
 
 
 @dc.dataclass
@@ -207,6 +420,9 @@ class SetQueuedPartitionStatus(Action):
     dataset_id: uuid.UUID
     version:    int
 
+    def cache_scopes(self, cursor):
+        return [cache.dataset_scope(self.dataset_id)]
+
     def _execute(self, cursor):
         cursor.execute('''
             SELECT id
@@ -216,10 +432,11 @@ class SetQueuedPartitionStatus(Action):
             AND dataset_id = %s
             AND version = %s
         ''', (self.hub_id, self.dataset_id, self.version))
-        for row in cursor.fetchall():
-            upsert(cursor, PartitionStatus(row[0],
-                                           Status.QUEUED.value,
-                                           dt.datetime.now(tz=pytz.utc)))
+        updated_at = dt.datetime.now(tz=pytz.utc)
+        upsert_many(cursor, [
+            PartitionStatus(row[0], Status.QUEUED.value, updated_at)
+            for row in cursor.fetchall()
+        ])
 
 
 @dc.dataclass
@@ -227,7 +444,69 @@ class UpdatePartitionStatus(Action):
     partition_id: uuid.UUID
     status:       Status
 
+    def cache_scopes(self, cursor):
+        return partition_scopes(cursor, [self.partition_id])
+
     def _execute(self, cursor):
         upsert(cursor, PartitionStatus(self.partition_id,
                                        self.status.value,
                                        dt.datetime.now(tz=pytz.utc)))
+
+
+@dc.dataclass
+class UpdatePartitionStatuses(Action):
+    statuses: t.List[t.Tuple[uuid.UUID, Status]]
+
+    def cache_scopes(self, cursor):
+        return partition_scopes(cursor, [partition_id for partition_id, _ in self.statuses])
+
+    def _execute(self, cursor):
+        updated_at = dt.datetime.now(tz=pytz.utc)
+        upsert_many(cursor, [
+            PartitionStatus(partition_id, status.value, updated_at)
+            for (partition_id, status) in self.statuses
+        ])
+
+
+@dc.dataclass
+class ReplaceDiscoveryCheckpoints(Action):
+    hub_id:      uuid.UUID
+    dataset_id:  uuid.UUID
+    version:     int
+    checkpoints: t.Dict[str, int]
+
+    def _execute(self, cursor):
+        cursor.execute('''
+            DELETE FROM discovery_checkpoints
+            WHERE
+                hub_id = %s
+            AND dataset_id = %s
+            AND version = %s
+        ''', (self.hub_id, self.dataset_id, self.version))
+
+        updated_at = dt.datetime.now(tz=pytz.utc)
+        write_many(cursor, [
+            DiscoveryCheckpoint(self.hub_id, self.dataset_id, self.version, path, mtime_ns, updated_at)
+            for path, mtime_ns in self.checkpoints.items()
+        ])
+
+
+@dc.dataclass
+class UpdatePartitionStats(Action):
+    stats: t.List[t.Tuple[uuid.UUID, int, int, t.Optional[int]]]
+
+    def cache_scopes(self, cursor):
+        return partition_scopes(cursor, [partition_id for partition_id, _, _, _ in self.stats])
+
+    def _execute(self, cursor):
+        psql.extras.execute_values(cursor, '''
+            UPDATE partitions par
+            SET
+                byte_count = sta.byte_count,
+                file_count = sta.file_count,
+                row_count = COALESCE(sta.row_count, par.row_count)
+            FROM
+                (VALUES %s) AS sta (id, byte_count, file_count, row_count)
+            WHERE
+                par.id = sta.id
+        ''', self.stats, template='(%s::uuid, %s::bigint, %s::int, %s::int)', page_size=1000)
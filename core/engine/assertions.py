@@ -3,7 +3,7 @@ import dataclasses as dc
 import typing as t
 import uuid
 
-from core.engine import logging, security
+from core.engine import logging, security, statements
 
 
 class Assertion(abc.ABC):
@@ -27,10 +27,33 @@ class NoOverlappingPartitions(Assertion):
     hub_id:     uuid.UUID
     dataset_id: uuid.UUID
     version:    int
+    partitions: t.List[t.Tuple[str, t.List[str], t.Any, t.Any]]
 
     status_code = 400
 
+    def __intervals(self, cursor):
+        cursor.execute('''
+            SELECT path, partition_values
+            FROM partitions
+            WHERE
+                hub_id = %s
+            AND dataset_id = %s
+            AND version = %s
+            AND path = ANY(%s)
+            AND deleted_at IS NULL
+        ''', (self.hub_id, self.dataset_id, self.version, [path for path, _, _, _ in self.partitions]))
+        registered = {(row[0], tuple(row[1])) for row in cursor.fetchall()}
+
+        # Exact re-posts are left to the insert's conflict report instead of failing the whole batch
+        intervals = {}
+        for path, values, start_time, end_time in self.partitions:
+            if (path, tuple(values or [])) not in registered:
+                intervals.setdefault((path, tuple(values or [])), (start_time, end_time))
+        return list(intervals.values())
+
     def _check(self, cursor):
+        # Serialises overlap checks on this version until commit, without blocking the FOR KEY SHARE locks
+        # that foreign key checks on concurrent partition inserts take
         cursor.execute('''
             SELECT
                 is_overlapping
@@ -40,20 +63,58 @@ class NoOverlappingPartitions(Assertion):
                 hub_id = %s
             AND dataset_id = %s
             AND version = %s
+            FOR NO KEY UPDATE
         ''', (self.hub_id, self.dataset_id, self.version))
         if cursor.fetchone()[0]:
             return True
 
+        intervals = self.__intervals(cursor)
+        if not intervals:
+            return True
+
+        # Registered partitions never overlap, so the one starting last before a candidate ends is the only
+        # neighbour that can overlap it
         cursor.execute('''
-            SELECT
-                id
+            WITH candidates AS (
+                SELECT start_time, end_time
+                FROM unnest(%s::timestamptz[], %s::timestamptz[]) AS can(start_time, end_time)
+                WHERE
+                    start_time IS NOT NULL
+                AND end_time IS NOT NULL
+            )
+            SELECT 1
             FROM
-                partitions_with_last_end_time
-            WHERE
-                hub_id = %s
-            AND dataset_id = %s
-            AND version = %s
-        ''', (self.hub_id, self.dataset_id, self.version))
+                candidates can
+            CROSS JOIN LATERAL (
+                SELECT par.end_time
+                FROM partitions par
+                WHERE
+                    par.hub_id = %s
+                AND par.dataset_id = %s
+                AND par.version = %s
+                AND par.start_time < can.end_time
+                AND par.end_time IS NOT NULL
+                AND par.deleted_at IS NULL
+                ORDER BY par.start_time DESC
+                LIMIT 1
+            ) nei
+            WHERE nei.end_time > can.start_time
+            UNION ALL
+            SELECT 1
+            FROM (
+                SELECT
+                    start_time,
+                    max(end_time) OVER (
+                        ORDER BY start_time
+                        ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+                    ) last_end_time
+                FROM candidates
+            ) can
+            WHERE can.last_end_time > can.start_time
+            LIMIT 1
+        ''', ([start_time for start_time, _ in intervals],
+              [end_time for _, end_time in intervals],
+              self.hub_id, self.dataset_id, self.version))
         return cursor.rowcount == 0
 
     def message(self):
@@ -85,7 +146,7 @@ class HubExists(Assertion):
     status_code = 404
 
     def _check(self, cursor):
-        cursor.execute('''
+        statements.execute(cursor, 'hub_exists', '''
             SELECT 1
             FROM hubs
             WHERE id = %s
@@ -104,7 +165,7 @@ class DatasetExists(Assertion):
     status_code = 404
 
     def _check(self, cursor):
-        cursor.execute('''
+        statements.execute(cursor, 'dataset_exists', '''
             SELECT 1
             FROM datasets
             WHERE
@@ -156,7 +217,7 @@ class VersionExists(Assertion):
     status_code = 404
 
     def _check(self, cursor):
-        cursor.execute('''
+        statements.execute(cursor, 'version_exists', '''
             SELECT
                 1
             FROM
@@ -178,6 +239,7 @@ class CorrectPassword(Assertion):
     password: str
 
     status_code = 403
+    new_hash = None
 
     def _check(self, cursor):
         cursor.execute('''
@@ -190,7 +252,8 @@ class CorrectPassword(Assertion):
             return False
 
         hash = cursor.fetchone()[0]
-        return security.pwd_context.verify(self.password, hash)
+        is_correct, self.new_hash = security.verify_and_update(self.password, hash)
+        return is_correct
 
     def message(self):
         return f'Incorrect password for {self.email}'
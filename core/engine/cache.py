@@ -0,0 +1,248 @@
+import argparse
+import collections as cl
+import multiprocessing.managers
+import os
+import pickle
+import threading
+import time
+import weakref
+
+from core.engine import logging
+
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_TTL = 300.0
+DEFAULT_ADDRESS = '127.0.0.1:5050'
+
+backend = None
+
+# Scopes written by uncommitted transactions, bumped in one statement by flush right before commit
+pending = weakref.WeakKeyDictionary()
+pending_lock = threading.Lock()
+
+
+class LocalCache:
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = cl.OrderedDict()
+        self.metrics = {
+            'hits': 0,
+            'misses': 0,
+            'expired': 0,
+            'evicted': 0,
+        }
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.metrics['misses'] += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                self.metrics['expired'] += 1
+                self.metrics['misses'] += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.metrics['hits'] += 1
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.metrics['evicted'] += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                **self.metrics,
+            }
+
+
+class CacheManager(multiprocessing.managers.BaseManager):
+    pass
+
+
+class SharedCache:
+
+    def __init__(self, address, authkey):
+        CacheManager.register('cache')
+        self.manager = CacheManager(address=address, authkey=authkey)
+        self.manager.connect()
+        self.local = threading.local()
+
+    @property
+    def cache(self):
+        # Manager proxies are not safe to share between threads
+        if not hasattr(self.local, 'cache'):
+            self.local.cache = self.manager.cache()
+        return self.local.cache
+
+    def get(self, key):
+        try:
+            return self.cache.get(key)
+        except (OSError, EOFError):
+            del self.local.cache
+            raise
+
+    def set(self, key, value):
+        try:
+            self.cache.set(key, value)
+        except (OSError, EOFError):
+            del self.local.cache
+            raise
+
+    def clear(self):
+        self.cache.clear()
+
+    def stats(self):
+        return self.cache.stats()
+
+
+def parse_address(address):
+    host, port = address.rsplit(':', 1)
+    return host, int(port)
+
+
+def serve(address, authkey, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+    shared = LocalCache(max_entries, ttl)
+    CacheManager.register('cache', callable=lambda: shared)
+    CacheManager(address=address, authkey=authkey).get_server().serve_forever()
+
+
+def configure(kind, address=DEFAULT_ADDRESS, authkey=None, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+    global backend
+
+    if kind == 'shared' and not authkey:
+        raise ValueError('shared cache backend requires CACHE_AUTHKEY')
+
+    if kind == 'local':
+        backend = LocalCache(max_entries, ttl)
+    elif kind == 'shared':
+        backend = SharedCache(parse_address(address), authkey)
+    elif kind == 'none':
+        backend = None
+    else:
+        raise ValueError(f'unknown cache backend: {kind}')
+
+    return backend
+
+
+def load(key):
+    try:
+        value = backend.get(key)
+    except (OSError, EOFError) as e:
+        logging.warn('cache_unavailable', error=str(e))
+        return None
+
+    if value is None:
+        return None
+    return pickle.loads(value)
+
+
+def store(key, value):
+    try:
+        backend.set(key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except (OSError, EOFError) as e:
+        logging.warn('cache_unavailable', error=str(e))
+
+
+def stats():
+    if backend is None:
+        return {'backend': 'none'}
+    return {'backend': backend.__class__.__name__, **backend.stats()}
+
+
+def hub_scope(hub_id):
+    return f'hub:{hub_id}'
+
+
+def dataset_scope(dataset_id):
+    return f'dataset:{dataset_id}'
+
+
+def roles_scope(user_id):
+    return f'roles:{user_id}'
+
+
+def bump(cursor, scopes):
+    scopes = sorted(set(scopes))
+    if not scopes:
+        return
+
+    cursor.execute('''
+        INSERT INTO cache_generations (scope, generation)
+        SELECT scope, 1
+        FROM unnest(%s::text[]) AS sco(scope)
+        ON CONFLICT (scope) DO UPDATE
+        SET generation = cache_generations.generation + 1
+    ''', (scopes, ))
+
+
+def defer_bump(cursor, scopes):
+    with pending_lock:
+        pending.setdefault(cursor.connection, set()).update(scopes)
+
+
+def has_pending(cursor):
+    with pending_lock:
+        return bool(pending.get(cursor.connection))
+
+
+def flush(cursor):
+    with pending_lock:
+        scopes = pending.pop(cursor.connection, ())
+    bump(cursor, scopes)
+
+
+def discard(conn):
+    with pending_lock:
+        pending.pop(conn, None)
+
+
+def generations(cursor, scopes):
+    # Leads with the table's oid, which changes whenever init.sql recreates it, so keys cached before a reset
+    # can never match the restarted generations
+    cursor.execute('''
+        SELECT
+            'cache_generations'::regclass::oid,
+            array_agg(scope),
+            array_agg(generation)
+        FROM cache_generations
+        WHERE scope = ANY(%s)
+    ''', (list(scopes), ))
+    epoch, found_scopes, found_generations = cursor.fetchone()
+    found = dict(zip(found_scopes or [], found_generations or []))
+    return (epoch, ) + tuple(found.get(scope, 0) for scope in scopes)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Shared view cache server')
+    parser.add_argument('--address', default=os.environ.get('CACHE_ADDRESS', DEFAULT_ADDRESS))
+    parser.add_argument('--max-entries', type=int, default=DEFAULT_MAX_ENTRIES)
+    parser.add_argument('--ttl', type=float, default=DEFAULT_TTL)
+    args = parser.parse_args()
+
+    # Values are unpickled by every client, so the manager must never accept an unauthenticated connection
+    if not os.environ.get('CACHE_AUTHKEY'):
+        parser.error('CACHE_AUTHKEY must be set')
+
+    serve(parse_address(args.address),
+          os.environ['CACHE_AUTHKEY'].encode('utf-8'),
+          args.max_entries,
+          args.ttl)
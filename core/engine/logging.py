@@ -7,6 +7,9 @@ import uuid
 
 import structlog
 
+MAX_LOGGED_ITEMS = 20
+SECRET_ARGS = {'password', 'password_hash'}
+
 
 def simplify_arg(arg):
     if isinstance(arg, (uuid.UUID, pathlib.Path)):
@@ -15,12 +18,14 @@ def simplify_arg(arg):
         return arg.value
     if isinstance(arg, dt.datetime):
         return arg.strftime('%Y-%m-%dT%H:%M:%S')
+    if isinstance(arg, list) and len(arg) > MAX_LOGGED_ITEMS:
+        return f'<{len(arg)} items>'
     return arg
 
 
 def simplify_args(args):
     return {
-        key: simplify_arg(value)
+        key: '<redacted>' if key in SECRET_ARGS else simplify_arg(value)
         for key, value in args.items()
     }
 
@@ -1,4 +1,103 @@
+import concurrent.futures as cf
+import concurrent.futures.process
+import os
+import threading
+import time
+
 import passlib.context
 
+# Unset parameters keep the library defaults, so existing hashes are not rehashed on login
+ARGON2_SETTINGS = {
+    f'argon2__{setting}': int(os.environ[variable])
+    for setting, variable in [
+        ('rounds', 'ARGON2_TIME_COST'),
+        ('memory_cost', 'ARGON2_MEMORY_COST'),
+        ('parallelism', 'ARGON2_PARALLELISM'),
+    ]
+    if variable in os.environ
+}
+
+PASSWORD_WORKERS = int(os.environ.get('PASSWORD_WORKERS', 2))
+PASSWORD_MAX_PENDING = int(os.environ.get('PASSWORD_MAX_PENDING', 16))
+
+pwd_context = passlib.context.CryptContext(schemes=['argon2'], **ARGON2_SETTINGS)
+
+lock = threading.Lock()
+executor = None
+pending = 0
+metrics = {
+    operation: {
+        'calls': 0,
+        'rejected': 0,
+        'errors': 0,
+        'total_ms': 0.0,
+        'max_ms': 0.0,
+    }
+    for operation in ['hash', 'verify']
+}
+
+
+class Overloaded(Exception):
+    pass
+
+
+def _hash(password):
+    return pwd_context.hash(password)
+
+
+def _verify_and_update(password, password_hash):
+    return pwd_context.verify_and_update(password, password_hash)
+
+
+def submit(operation, fn, *args):
+    global executor, pending
+
+    with lock:
+        if pending >= PASSWORD_MAX_PENDING:
+            metrics[operation]['rejected'] += 1
+            raise Overloaded('too many concurrent password checks, try again later')
+        if executor is None:
+            executor = cf.ProcessPoolExecutor(max_workers=PASSWORD_WORKERS)
+        pending += 1
+        pool = executor
+
+    start_time = time.time()
+    try:
+        return pool.submit(fn, *args).result()
+    except cf.process.BrokenProcessPool:
+        with lock:
+            metrics[operation]['errors'] += 1
+            if executor is pool:
+                executor = None
+        raise
+    finally:
+        elapsed = (time.time() - start_time) * 1000
+        with lock:
+            pending -= 1
+            metrics[operation]['calls'] += 1
+            metrics[operation]['total_ms'] += elapsed
+            metrics[operation]['max_ms'] = max(metrics[operation]['max_ms'], elapsed)
+
+
+def hash_password(password):
+    return submit('hash', _hash, password)
+
+
+def verify_and_update(password, password_hash):
+    return submit('verify', _verify_and_update, password, password_hash)
+
 
-pwd_context = passlib.context.CryptContext(schemes=['argon2'])
+def stats():
+    with lock:
+        return {
+            'workers': PASSWORD_WORKERS,
+            'max_pending': PASSWORD_MAX_PENDING,
+            'pending': pending,
+            'operations': {
+                operation: {
+                    'mean_ms': round(values['total_ms'] / values['calls'], ndigits=4) if values['calls'] else 0.0,
+                    **values,
+                }
+                for operation, values in metrics.items()
+            },
+        }
@@ -0,0 +1,76 @@
+import itertools
+import re
+import threading
+import time
+import weakref
+
+lock = threading.Lock()
+prepared = weakref.WeakKeyDictionary()
+timings = {}
+
+
+def numbered_placeholders(sql):
+    counter = itertools.count(1)
+    return re.sub('%s', lambda _: f'${next(counter)}', sql)
+
+
+def record(name, elapsed, prepare):
+    with lock:
+        timing = timings.setdefault(name, {
+            'calls': 0,
+            'prepares': 0,
+            'total_ms': 0.0,
+            'max_ms': 0.0,
+        })
+        timing['calls'] += 1
+        timing['prepares'] += int(prepare)
+        timing['total_ms'] += elapsed
+        timing['max_ms'] = max(timing['max_ms'], elapsed)
+
+
+def execute(cursor, name, sql, params=()):
+    start_time = time.time()
+
+    with lock:
+        names = prepared.setdefault(cursor.connection, set())
+        prepare = name not in names
+
+    if prepare:
+        cursor.execute(f'PREPARE {name} AS {numbered_placeholders(sql)}')
+        with lock:
+            names.add(name)
+
+    if params:
+        cursor.execute(f'EXECUTE {name} ({", ".join(["%s" for _ in params])})', params)
+    else:
+        cursor.execute(f'EXECUTE {name}')
+
+    record(name, (time.time() - start_time) * 1000, prepare)
+
+
+def stream(connection, name, sql, params=(), itersize=1000):
+    start_time = time.time()
+    try:
+        with connection.cursor(name) as cursor:
+            cursor.itersize = itersize
+            cursor.execute(sql, params)
+            yield from cursor
+    finally:
+        # Named cursors are never prepared, so keep their timings apart from the prepared statement of the same name
+        record(f'{name}:stream', (time.time() - start_time) * 1000, False)
+
+
+def stats():
+    with lock:
+        return sorted(
+            [
+                {
+                    'name': name,
+                    'mean_ms': round(timing['total_ms'] / timing['calls'], ndigits=4),
+                    **timing,
+                }
+                for name, timing in timings.items()
+            ],
+            key=lambda timing: timing['total_ms'],
+            reverse=True,
+        )
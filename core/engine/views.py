@@ -1,28 +1,57 @@
 import abc
 import collections as cl
 import dataclasses as dc
+import datetime as dt
+import itertools
+import typing as t
 import uuid
 
 import jinja2 as jinja
 
-from core.data import AccessLevel
-from core.engine import logging
+from core.engine import cache, logging, statements
 
 
 class View(abc.ABC):
 
     def fetch(self, cursor):
         logging.info(f'fetch_{self.__class__.__name__}', **self.__dict__)
-        return self._fetch(cursor)
+
+        scopes = self.cache_scopes()
+        if cache.backend is None or scopes is None or cache.has_pending(cursor):
+            return self._fetch(cursor)
+
+        key = repr((self.__class__.__name__, tuple(self.__dict__.items()), cache.generations(cursor, scopes)))
+        result = cache.load(key)
+        if result is None:
+            result = self._fetch(cursor)
+            cache.store(key, result)
+        return result
+
+    def cache_scopes(self):
+        return None
+
+    def etag_scopes(self):
+        return self.cache_scopes()
 
     @abc.abstractmethod
     def _fetch(self, cursor):
         pass
 
 
+def select(cursor, name, sql, params, to_dict, stream=False):
+    if stream:
+        return map(to_dict, statements.stream(cursor.connection, name, sql, params))
+
+    statements.execute(cursor, name, sql, params)
+    return [to_dict(row) for row in cursor.fetchall()]
+
+
 @dc.dataclass
 class ListUsers(View):
 
+    def cache_scopes(self):
+        return ['users']
+
     def _fetch(self, cursor):
         cursor.execute('''
             SELECT id, email, created_at
@@ -44,6 +73,9 @@ class ListUsers(View):
 @dc.dataclass
 class ListTeams(View):
 
+    def cache_scopes(self):
+        return ['teams']
+
     def _fetch(self, cursor):
         cursor.execute('''
             SELECT id, name, created_at
@@ -62,15 +94,36 @@ class ListTeams(View):
         }
 
 
+def next_offset(rows, limit, offset):
+    if limit is None or len(rows) <= limit:
+        return None
+    return offset + limit
+
+
 @dc.dataclass
 class ListHubs(View):
+    hub_ids: t.Optional[t.List[uuid.UUID]] = None
+    limit:   t.Optional[int] = None
+    offset:  int = 0
+
+    def cache_scopes(self):
+        return ['hubs']
 
     def _fetch(self, cursor):
-        cursor.execute('''
+        where = 'WHERE id = ANY(%(hub_ids)s::uuid[])' if self.hub_ids is not None else ''
+        cursor.execute(f'''
             SELECT id, name, team_id, team_name, created_at
             FROM hubs_with_team_name
-            ORDER BY created_at
-        ''')
+            {where}
+            ORDER BY created_at, id
+            LIMIT %(limit)s
+            OFFSET %(offset)s
+        ''', {
+            'hub_ids': self.hub_ids,
+            'limit': None if self.limit is None else self.limit + 1,
+            'offset': self.offset,
+        })
+        rows = cursor.fetchall()
         return {
             'hubs': [
                 {
@@ -80,22 +133,31 @@ class ListHubs(View):
                     'team_name': row[3],
                     'created_at': row[4],
                 }
-                for row in cursor.fetchall()
-            ]
+                for row in rows[:self.limit]
+            ],
+            'next': next_offset(rows, self.limit, self.offset),
         }
 
 
 @dc.dataclass
 class ListDatasets(View):
     hub_id: uuid.UUID
+    limit:  t.Optional[int] = None
+    offset: int = 0
+
+    def cache_scopes(self):
+        return [cache.hub_scope(self.hub_id)]
 
     def _fetch(self, cursor):
-        cursor.execute('''
+        statements.execute(cursor, 'list_datasets', '''
             SELECT id, name, version, created_at, published_at
             FROM datasets_with_current_versions
             WHERE hub_id = %s
-            ORDER BY created_at
-        ''', (self.hub_id,))
+            ORDER BY created_at, id
+            LIMIT %s
+            OFFSET %s
+        ''', (self.hub_id, None if self.limit is None else self.limit + 1, self.offset))
+        rows = cursor.fetchall()
         return {
             'datasets': [
                 {
@@ -106,8 +168,9 @@ class ListDatasets(View):
                     'created_at': row[3],
                     'published_at': row[4],
                 }
-                for row in cursor.fetchall()
-            ]
+                for row in rows[:self.limit]
+            ],
+            'next': next_offset(rows, self.limit, self.offset),
         }
 
 
@@ -135,9 +198,14 @@ class ListBackends(View):
 class ListVersions(View):
     hub_id:     uuid.UUID
     dataset_id: uuid.UUID
+    limit:      t.Optional[int] = None
+    offset:     int = 0
+
+    def cache_scopes(self):
+        return [cache.dataset_scope(self.dataset_id)]
 
     def _fetch(self, cursor):
-        cursor.execute('''
+        statements.execute(cursor, 'list_versions', '''
             SELECT
                 ver.version,
                 ver.module,
@@ -158,8 +226,11 @@ class ListVersions(View):
             WHERE
                 ver.hub_id = %s
             AND ver.dataset_id = %s
-            ORDER BY ver.created_at
-        ''', (self.hub_id, self.dataset_id))
+            ORDER BY ver.created_at, ver.version
+            LIMIT %s
+            OFFSET %s
+        ''', (self.hub_id, self.dataset_id, None if self.limit is None else self.limit + 1, self.offset))
+        rows = cursor.fetchall()
         return {
             'versions': [
                 {
@@ -172,8 +243,9 @@ class ListVersions(View):
                     'created_at': row[4],
                     'published': row[5],
                 }
-                for row in cursor.fetchall()
-            ]
+                for row in rows[:self.limit]
+            ],
+            'next': next_offset(rows, self.limit, self.offset),
         }
 
 
@@ -185,7 +257,7 @@ class ListPartitions(View):
 
     def _fetch(self, cursor):
         cursor.execute('''
-            SELECT id, path
+            SELECT id, path, partition_values
             FROM partitions
             WHERE
                 hub_id = %s
@@ -198,47 +270,203 @@ class ListPartitions(View):
                 {
                     'id': row[0],
                     'path': row[1],
+                    'partition_values': row[2],
                 }
                 for row in cursor.fetchall()
             ]
         }
 
 
+PARTITION_ORDERS = [
+    'partition_values', 'path', 'row_count', 'byte_count', 'file_count', 'start_time', 'end_time', 'created_at',
+    'status',
+]
+
+
 @dc.dataclass
-class DetailUser(View):
-    email: str
+class PagePartitions(View):
+    hub_id:     uuid.UUID
+    dataset_id: uuid.UUID
+    version:    int
+    order_by:   str = 'end_time'
+    descending: bool = False
+    limit:      int = 100
+    offset:     int = 0
+    after:      t.Optional[t.Tuple[t.Any, uuid.UUID]] = None
+    values:     t.List[str] = dc.field(default_factory=list)
+    status:     t.Optional[str] = None
+    from_time:  t.Optional[dt.datetime] = None
+    to_time:    t.Optional[dt.datetime] = None
+    count:      bool = False
+
+    def cache_scopes(self):
+        return [cache.dataset_scope(self.dataset_id)]
+
+    def __filters(self):
+        conditions = ['hub_id = %s', 'dataset_id = %s', 'version = %s']
+        params = [self.hub_id, self.dataset_id, self.version]
+
+        if self.values:
+            conditions.append('partition_values @> %s::text[]')
+            params.append(self.values)
+        if self.status:
+            conditions.append('status = %s')
+            params.append(self.status)
+        if self.from_time:
+            conditions.append('end_time > %s')
+            params.append(self.from_time)
+        if self.to_time:
+            conditions.append('start_time < %s')
+            params.append(self.to_time)
+
+        return conditions, params
+
+    def __keyset(self):
+        value, partition_id = self.after
+        column = self.order_by
+
+        # Postgres sorts NULLs last ascending and first descending
+        if self.descending:
+            if value is None:
+                return f'({column} IS NOT NULL OR id < %s)', [partition_id]
+            return f'({column} < %s OR ({column} = %s AND id < %s))', [value, value, partition_id]
+
+        if value is None:
+            return f'({column} IS NULL AND id > %s)', [partition_id]
+        return f'({column} > %s OR ({column} = %s AND id > %s) OR {column} IS NULL)', [value, value, partition_id]
 
     def _fetch(self, cursor):
-        cursor.execute('''
-            SELECT id
-            FROM users
-            WHERE email = %s
-        ''', (self.email, ))
-        user_id = cursor.fetchone()[0]
+        if self.order_by not in PARTITION_ORDERS:
+            raise ValueError(f'cannot order partitions by {self.order_by}')
 
+        conditions, params = self.__filters()
+        result = {}
+
+        if self.count:
+            cursor.execute('''
+                SELECT count(*)
+                FROM partitions_with_status
+                WHERE
+                    hub_id = %s
+                AND dataset_id = %s
+                AND version = %s
+            ''', (self.hub_id, self.dataset_id, self.version))
+            result['total'] = cursor.fetchone()[0]
+
+            cursor.execute(f'''
+                SELECT count(*)
+                FROM partitions_with_status
+                WHERE {' AND '.join(conditions)}
+            ''', params)
+            result['filtered'] = cursor.fetchone()[0]
+
+        if self.after is not None:
+            condition, keyset_params = self.__keyset()
+            conditions.append(condition)
+            params.extend(keyset_params)
+
+        direction = 'DESC' if self.descending else 'ASC'
+        cursor.execute(f'''
+            SELECT
+                id,
+                partition_values,
+                path,
+                row_count,
+                byte_count,
+                file_count,
+                start_time,
+                end_time,
+                created_at,
+                status,
+                updated_at
+            FROM
+                partitions_with_status
+            WHERE {' AND '.join(conditions)}
+            ORDER BY {self.order_by} {direction}, id {direction}
+            LIMIT %s
+            OFFSET %s
+        ''', params + [self.limit + 1, self.offset])
+        rows = cursor.fetchall()
+
+        result['partitions'] = [{
+            'id': row[0],
+            'partition_values': row[1],
+            'path': row[2],
+            'row_count': row[3],
+            'byte_count': row[4],
+            'file_count': row[5],
+            'start_time': row[6],
+            'end_time': row[7],
+            'created_at': row[8],
+            'status': row[9],
+            'updated_at': row[10],
+        } for row in rows[:self.limit]]
+
+        result['next'] = None
+        if len(rows) > self.limit:
+            last = result['partitions'][-1]
+            result['next'] = (last[self.order_by], last['id'])
+
+        return result
+
+
+@dc.dataclass
+class ListDiscoveryCheckpoints(View):
+    hub_id:     uuid.UUID
+    dataset_id: uuid.UUID
+    version:    int
+
+    def _fetch(self, cursor):
         cursor.execute('''
-            WITH user_teams AS (
-                SELECT team_id
-                FROM team_members
-                WHERE user_id = %s
-            )
+            SELECT path, mtime_ns
+            FROM discovery_checkpoints
+            WHERE
+                hub_id = %s
+            AND dataset_id = %s
+            AND version = %s
+        ''', (self.hub_id, self.dataset_id, self.version))
+        return {
+            'checkpoints': {
+                row[0]: row[1]
+                for row in cursor.fetchall()
+            }
+        }
+
+
+@dc.dataclass
+class DetailUser(View):
+    email: str
+
+    def cache_scopes(self):
+        return ['users', 'teams']
+
+    def _fetch(self, cursor):
+        statements.execute(cursor, 'detail_user', '''
             SELECT
+                usr.id,
                 rol.hub_id,
-                rol.access_level
+                max(rol.access_level)
             FROM
-                current_team_roles_with_name rol
-            INNER JOIN
-                team_members tms
+                users usr
+            LEFT JOIN
+                current_team_members mem
             ON
-                rol.team_id = tms.team_id
-        ''', (user_id, ))
-        roles = {}
-        for row in cursor.fetchall():
-            hub_id = str(row[0])
-            if hub_id in roles:
-                roles[hub_id] = AccessLevel.highest_level(roles[hub_id], row[1])
-            else:
-                roles[hub_id] = row[1]
+                usr.id = mem.user_id
+            LEFT JOIN
+                current_team_roles rol
+            ON
+                mem.team_id = rol.team_id
+            WHERE
+                usr.email = %s
+            GROUP BY usr.id, rol.hub_id
+        ''', (self.email, ))
+        rows = cursor.fetchall()
+        user_id = rows[0][0]
+        roles = {
+            str(row[1]): row[2]
+            for row in rows
+            if row[1] is not None
+        }
 
         return {
             'user_id': user_id,
@@ -246,10 +474,40 @@ class DetailUser(View):
         }
 
 
+@dc.dataclass
+class UserRoles(View):
+    user_id: uuid.UUID
+
+    def _fetch(self, cursor):
+        statements.execute(cursor, 'user_roles', '''
+            SELECT
+                rol.hub_id,
+                max(rol.access_level)
+            FROM
+                current_team_members mem
+            INNER JOIN
+                current_team_roles rol
+            ON
+                mem.team_id = rol.team_id
+            WHERE
+                mem.user_id = %s
+            GROUP BY rol.hub_id
+        ''', (self.user_id, ))
+        return {
+            'roles': {
+                str(row[0]): row[1]
+                for row in cursor.fetchall()
+            }
+        }
+
+
 @dc.dataclass
 class DetailTeam(View):
     team_id: uuid.UUID
 
+    def cache_scopes(self):
+        return ['users', 'teams']
+
     def _fetch(self, cursor):
         cursor.execute('''
             SELECT
@@ -290,10 +548,26 @@ class DetailTeam(View):
         ''', (self.team_id, ))
         row = cursor.fetchone()
 
-        member_ids = [user['id'] for user in members]
-        users = [user
-                 for user in ListUsers()._fetch(cursor)['users']
-                 if user['id'] not in member_ids]
+        cursor.execute('''
+            SELECT
+                usr.id,
+                usr.email,
+                usr.created_at
+            FROM
+                users usr
+            WHERE
+                NOT EXISTS (
+                    SELECT 1
+                    FROM current_team_members mem
+                    WHERE mem.team_id = %s AND mem.user_id = usr.id
+                )
+            ORDER BY usr.created_at
+        ''', (self.team_id, ))
+        users = [{
+            'id': row[0],
+            'email': row[1],
+            'created_at': row[2],
+        } for row in cursor.fetchall()]
 
         return {
             'name': row[0],
@@ -307,8 +581,11 @@ class DetailTeam(View):
 class DetailHub(View):
     hub_id: uuid.UUID
 
+    def cache_scopes(self):
+        return [cache.hub_scope(self.hub_id)]
+
     def _fetch(self, cursor):
-        cursor.execute('''
+        statements.execute(cursor, 'detail_hub', '''
             SELECT name
             FROM hubs
             WHERE id = %s
@@ -324,8 +601,11 @@ class DetailDataset(View):
     hub_id:     uuid.UUID
     dataset_id: uuid.UUID
 
+    def cache_scopes(self):
+        return [cache.dataset_scope(self.dataset_id)]
+
     def _fetch(self, cursor):
-        cursor.execute('''
+        statements.execute(cursor, 'detail_dataset_connectors', '''
             SELECT id, name
             FROM connectors
             ORDER BY id
@@ -335,7 +615,7 @@ class DetailDataset(View):
             'name': row[1],
         } for row in cursor.fetchall()]
 
-        cursor.execute('''
+        statements.execute(cursor, 'detail_dataset_connections', '''
             SELECT
                 id,
                 connector_id,
@@ -356,7 +636,7 @@ class DetailDataset(View):
             'path': row[3],
         } for row in cursor.fetchall()]
 
-        cursor.execute('''
+        statements.execute(cursor, 'detail_dataset_name', '''
             SELECT name
             FROM datasets
             WHERE id = %s
@@ -371,12 +651,46 @@ class DetailDataset(View):
 
 @dc.dataclass
 class DetailVersion(View):
-    hub_id:     uuid.UUID
-    dataset_id: uuid.UUID
-    version:    int
+    hub_id:          uuid.UUID
+    dataset_id:      uuid.UUID
+    version:         int
+    with_partitions: bool = True
+    stream:          bool = False
+
+    def cache_scopes(self):
+        if self.with_partitions or self.stream:
+            return None
+        return self.etag_scopes()
+
+    def etag_scopes(self):
+        return [cache.dataset_scope(self.dataset_id)]
+
+    def __dependency(self, row):
+        return {
+            'parent': {
+                'hub_id': row[0],
+                'hub_name': row[1],
+                'dataset_id': row[2],
+                'dataset_name': row[3],
+                'version': row[4],
+                'key': f'{row[0]}:{row[2]}:{row[4]}',
+                'is_same_hub': row[0] == self.hub_id,
+                'is_selected': row[0] == self.hub_id and row[2] == self.dataset_id and row[4] == self.version,
+            },
+            'child': {
+                'hub_id': row[5],
+                'hub_name': row[6],
+                'dataset_id': row[7],
+                'dataset_name': row[8],
+                'version': row[9],
+                'key': f'{row[5]}:{row[7]}:{row[9]}',
+                'is_same_hub': row[5] == self.hub_id,
+                'is_selected': row[5] == self.hub_id and row[7] == self.dataset_id and row[9] == self.version,
+            },
+        }
 
     def _fetch(self, cursor):
-        cursor.execute('''
+        statements.execute(cursor, 'detail_version_columns', '''
             SELECT name, type_name, description, is_nullable, is_unique, has_pii
             FROM columns_with_type
             WHERE
@@ -394,204 +708,149 @@ class DetailVersion(View):
             'has_pii': row[5],
         } for row in cursor.fetchall()]
 
-        cursor.execute('''
-            SELECT
-                partition_values,
-                path,
-                row_count,
-                start_time,
-                end_time,
-                created_at,
-                status,
-                updated_at
-            FROM
-                partitions_with_status
-            WHERE
-                hub_id = %s
-            AND dataset_id = %s
-            AND version = %s
-            ORDER BY end_time, start_time DESC
-        ''', (self.hub_id, self.dataset_id, self.version))
-        partitions = [{
-            'partition_values': row[0],
-            'path': row[1],
-            'row_count': row[2],
-            'start_time': row[3],
-            'end_time': row[4],
-            'created_at': row[5],
-            'status': row[6],
-            'updated_at': row[7],
-        } for row in cursor.fetchall()]
-
-        cursor.execute('''
-            WITH RECURSIVE children AS (
+        partitions = None
+        if self.with_partitions:
+            partitions = select(cursor, 'detail_version_partitions', '''
                 SELECT
-                    parent_hub_id,
-                    parent_dataset_id,
-                    parent_version,
-                    child_hub_id,
-                    child_dataset_id,
-                    child_version
-                FROM dependencies
+                    partition_values,
+                    path,
+                    row_count,
+                    byte_count,
+                    file_count,
+                    start_time,
+                    end_time,
+                    created_at,
+                    status,
+                    updated_at
+                FROM
+                    partitions_with_status
                 WHERE
-                    parent_hub_id = %s
-                AND parent_dataset_id = %s
-                AND parent_version = %s
-                UNION
+                    hub_id = %s
+                AND dataset_id = %s
+                AND version = %s
+                ORDER BY end_time, start_time DESC
+            ''', (self.hub_id, self.dataset_id, self.version), lambda row: {
+                'partition_values': row[0],
+                'path': row[1],
+                'row_count': row[2],
+                'byte_count': row[3],
+                'file_count': row[4],
+                'start_time': row[5],
+                'end_time': row[6],
+                'created_at': row[7],
+                'status': row[8],
+                'updated_at': row[9],
+            }, self.stream)
+
+        children = select(cursor, 'detail_version_children', '''
+            WITH nodes AS (
                 SELECT
-                    dep.parent_hub_id,
-                    dep.parent_dataset_id,
-                    dep.parent_version,
-                    dep.child_hub_id,
-                    dep.child_dataset_id,
-                    dep.child_version
-                FROM
-                    dependencies AS dep
-                INNER JOIN
-                    children AS chi
-                ON
-                    dep.parent_hub_id = chi.child_hub_id
-                AND dep.parent_dataset_id = chi.child_dataset_id
-                AND dep.parent_version = chi.child_version
+                    %s::uuid AS hub_id,
+                    %s::uuid AS dataset_id,
+                    %s::int AS version
+                UNION ALL
+                SELECT
+                    descendant_hub_id,
+                    descendant_dataset_id,
+                    descendant_version
+                FROM dependency_closure
+                WHERE
+                    ancestor_hub_id = %s
+                AND ancestor_dataset_id = %s
+                AND ancestor_version = %s
             )
             SELECT
-                chi.parent_hub_id,
+                dep.parent_hub_id,
                 phub.name AS parent_hub_name,
-                chi.parent_dataset_id,
+                dep.parent_dataset_id,
                 pdat.name AS parent_dataset_name,
-                chi.parent_version,
-                chi.child_hub_id,
+                dep.parent_version,
+                dep.child_hub_id,
                 chub.name AS child_hub_name,
-                chi.child_dataset_id,
+                dep.child_dataset_id,
                 cdat.name AS child_dataset_name,
-                chi.child_version
+                dep.child_version
             FROM
-                children chi
+                nodes nod
+            INNER JOIN
+                dependencies dep
+            ON
+                dep.parent_hub_id = nod.hub_id
+            AND dep.parent_dataset_id = nod.dataset_id
+            AND dep.parent_version = nod.version
             INNER JOIN
                 hubs phub
             ON
-                chi.parent_hub_id = phub.id
+                dep.parent_hub_id = phub.id
             INNER JOIN
                 hubs chub
             ON
-                chi.child_hub_id = chub.id
+                dep.child_hub_id = chub.id
             INNER JOIN
                 datasets pdat
             ON
-                chi.parent_dataset_id = pdat.id
+                dep.parent_dataset_id = pdat.id
             INNER JOIN
                 datasets cdat
             ON
-                chi.child_dataset_id = cdat.id
-        ''', (self.hub_id, self.dataset_id, self.version))
-        dependencies = [{
-            'parent': {
-                'hub_id': row[0],
-                'hub_name': row[1],
-                'dataset_id': row[2],
-                'dataset_name': row[3],
-                'version': row[4],
-                'key': f'{row[0]}:{row[2]}:{row[4]}',
-                'is_same_hub': row[0] == self.hub_id,
-                'is_selected': row[0] == self.hub_id and row[2] == self.dataset_id and row[4] == self.version,
-            },
-            'child': {
-                'hub_id': row[5],
-                'hub_name': row[6],
-                'dataset_id': row[7],
-                'dataset_name': row[8],
-                'version': row[9],
-                'key': f'{row[5]}:{row[7]}:{row[9]}',
-                'is_same_hub': row[5] == self.hub_id,
-                'is_selected': row[5] == self.hub_id and row[7] == self.dataset_id and row[9] == self.version,
-            }
-        } for row in cursor.fetchall()]
+                dep.child_dataset_id = cdat.id
+        ''', (self.hub_id, self.dataset_id, self.version) * 2, self.__dependency, self.stream)
 
-        cursor.execute('''
-            WITH RECURSIVE parents AS (
+        parents = select(cursor, 'detail_version_parents', '''
+            WITH nodes AS (
                 SELECT
-                    parent_hub_id,
-                    parent_dataset_id,
-                    parent_version,
-                    child_hub_id,
-                    child_dataset_id,
-                    child_version
-                FROM dependencies
-                WHERE
-                    child_hub_id = %s
-                AND child_dataset_id = %s
-                AND child_version = %s
-                UNION
+                    %s::uuid AS hub_id,
+                    %s::uuid AS dataset_id,
+                    %s::int AS version
+                UNION ALL
                 SELECT
-                    dep.parent_hub_id,
-                    dep.parent_dataset_id,
-                    dep.parent_version,
-                    dep.child_hub_id,
-                    dep.child_dataset_id,
-                    dep.child_version
-                FROM
-                    dependencies AS dep
-                INNER JOIN
-                    parents AS par
-                ON
-                    dep.child_hub_id = par.parent_hub_id
-                AND dep.child_dataset_id = par.parent_dataset_id
-                AND dep.child_version = par.parent_version
+                    ancestor_hub_id,
+                    ancestor_dataset_id,
+                    ancestor_version
+                FROM dependency_closure
+                WHERE
+                    descendant_hub_id = %s
+                AND descendant_dataset_id = %s
+                AND descendant_version = %s
             )
             SELECT
-                par.parent_hub_id,
+                dep.parent_hub_id,
                 phub.name AS parent_hub_name,
-                par.parent_dataset_id,
+                dep.parent_dataset_id,
                 pdat.name AS parent_dataset_name,
-                par.parent_version,
-                par.child_hub_id,
+                dep.parent_version,
+                dep.child_hub_id,
                 chub.name AS child_hub_name,
-                par.child_dataset_id,
+                dep.child_dataset_id,
                 cdat.name AS child_dataset_name,
-                par.child_version
+                dep.child_version
             FROM
-                parents par
+                nodes nod
+            INNER JOIN
+                dependencies dep
+            ON
+                dep.child_hub_id = nod.hub_id
+            AND dep.child_dataset_id = nod.dataset_id
+            AND dep.child_version = nod.version
             INNER JOIN
                 hubs phub
             ON
-                par.parent_hub_id = phub.id
+                dep.parent_hub_id = phub.id
             INNER JOIN
                 hubs chub
             ON
-                par.child_hub_id = chub.id
+                dep.child_hub_id = chub.id
             INNER JOIN
                 datasets pdat
             ON
-                par.parent_dataset_id = pdat.id
+                dep.parent_dataset_id = pdat.id
             INNER JOIN
                 datasets cdat
             ON
-                par.child_dataset_id = cdat.id
-        ''', (self.hub_id, self.dataset_id, self.version))
-        dependencies.extend([{
-            'parent': {
-                'hub_id': row[0],
-                'hub_name': row[1],
-                'dataset_id': row[2],
-                'dataset_name': row[3],
-                'version': row[4],
-                'key': f'{row[0]}:{row[2]}:{row[4]}',
-                'is_same_hub': row[0] == self.hub_id,
-                'is_selected': row[0] == self.hub_id and row[2] == self.dataset_id and row[4] == self.version,
-            },
-            'child': {
-                'hub_id': row[5],
-                'hub_name': row[6],
-                'dataset_id': row[7],
-                'dataset_name': row[8],
-                'version': row[9],
-                'key': f'{row[5]}:{row[7]}:{row[9]}',
-                'is_same_hub': row[5] == self.hub_id,
-                'is_selected': row[5] == self.hub_id and row[7] == self.dataset_id and row[9] == self.version,
-            }
-        } for row in cursor.fetchall()])
+                dep.child_dataset_id = cdat.id
+        ''', (self.hub_id, self.dataset_id, self.version) * 2, self.__dependency, self.stream)
 
-        cursor.execute('''
+        statements.execute(cursor, 'detail_version_details', '''
             SELECT partition_keys, module, path, description, is_overlapping, created_at
             FROM versions_with_backend
             WHERE
@@ -615,7 +874,7 @@ class DetailVersion(View):
             },
             'columns': columns,
             'partitions': partitions,
-            'dependencies': dependencies,
+            'dependencies': itertools.chain(children, parents) if self.stream else children + parents,
         }
 
 
@@ -625,8 +884,11 @@ class SimpleDetailVersion(View):
     dataset_id: uuid.UUID
     version:    int
 
+    def cache_scopes(self):
+        return [cache.dataset_scope(self.dataset_id)]
+
     def _fetch(self, cursor):
-        cursor.execute('''
+        statements.execute(cursor, 'simple_detail_version', '''
             SELECT
                 backend_id, partition_keys, path
             FROM
@@ -663,6 +925,9 @@ class RenderConnection(View):
 @dc.dataclass
 class PublishedVersions(View):
 
+    def cache_scopes(self):
+        return ['published']
+
     def _fetch(self, cursor):
         published = cl.defaultdict(lambda: cl.defaultdict(list))
 
@@ -673,4 +938,7 @@ class PublishedVersions(View):
         for row in cursor.fetchall():
             published[f'{row[0]}:{row[1]}'][f'{row[2]}:{row[3]}'].append(row[4])
 
-        return published
+        return {
+            hub: dict(datasets)
+            for hub, datasets in published.items()
+        }
@@ -1,6 +1,9 @@
 import dataclasses as dc
 import typing as t
 
+# pq's insert trigger NOTIFYs a channel named after the queue on every put
+QUEUE_NAME = 'jobs'
+
 
 @dc.dataclass
 class Job:
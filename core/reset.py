@@ -3,7 +3,7 @@ import psycopg2 as psql
 import psycopg2.extras
 
 from core.data import Hub, Dataset, Backend, Backends, Connectors, DatasetVersion, \
-    PublishedVersion, Type, Types, Column, Partition, write
+    PublishedVersion, Type, Types, Column, Partition, write_many
 
 psql.extras.register_uuid()
 
@@ -21,13 +21,8 @@ if __name__ == '__main__':
     for kind in [Hub, Dataset, Backend, DatasetVersion, PublishedVersion, Type, Column, Partition]:
         truncate(cursor, kind)
 
-    for entry in Types:
-        write(cursor, entry)
-
-    for entry in Backends:
-        write(cursor, entry)
-
-    for entry in Connectors:
-        write(cursor, entry)
+    write_many(cursor, Types)
+    write_many(cursor, Backends)
+    write_many(cursor, Connectors)
 
     conn.commit()
@@ -126,6 +126,17 @@ def new_partition(hub_id, dataset_id, version, path, values, count, start, end):
     )['partition_id']
 
 
+def new_partitions(hub_id, dataset_id, version, partitions):
+    return post(
+        f'hubs/{hub_id}/datasets/{dataset_id}/versions/{version}/partitions/bulk.json',
+        [
+            {'path': path, 'partition_values': values,
+             'row_count': count, 'start_time': start, 'end_time': end}
+            for (path, values, count, start, end) in partitions
+        ],
+    )
+
+
 def build_full_dataset(hub_id, dataset_name, columns, version_count=5, depends_on=None):
     depends_on = depends_on or []
     dataset_id = new_dataset(hub_id, dataset_name)
@@ -135,7 +146,7 @@ def build_full_dataset(hub_id, dataset_name, columns, version_count=5, depends_o
         new_version(
             hub_id, dataset_id,
             FileBackend.module, str(dataset_path.joinpath(str(i))), ['country', 'day'],
-            '', False,
+            '', True,
             columns,
             depends_on,
         )
@@ -148,6 +159,7 @@ def build_full_dataset(hub_id, dataset_name, columns, version_count=5, depends_o
         today = dt.datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
         start = today - dt.timedelta(days=(duration + random.randint(0, 10)))
 
+        partitions = []
         for day_increment in range(duration):
             part_start = start + dt.timedelta(days=day_increment)
             part_end = part_start + dt.timedelta(days=1)
@@ -155,13 +167,14 @@ def build_full_dataset(hub_id, dataset_name, columns, version_count=5, depends_o
 
             for country in ['CA', 'US']:
                 part_path = str(version_path.joinpath(f'country={country}/day={part_day}'))
-                new_partition(
-                    hub_id, dataset_id, version, part_path,
-                    [country, part_day],
+                partitions.append((
+                    part_path, [country, part_day],
                     random.randint(10, 2000), part_start, part_end
-                )
+                ))
                 pathlib.Path(part_path).mkdir(parents=True, exist_ok=True)
 
+        new_partitions(hub_id, dataset_id, version, partitions)
+
     published_version = versions[random.randint(-1 * version_count, -1)]
     publish_version(hub_id, dataset_id, published_version)
 
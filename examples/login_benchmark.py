@@ -0,0 +1,96 @@
+import datetime as dt
+import random
+import statistics
+import time
+import uuid
+
+import psycopg2 as psql
+import psycopg2.extras
+import pytz
+
+from core.data import AccessLevel, CurrentTeamMember, CurrentTeamRole, Hub, Team, TeamMember, TeamRole, User, \
+    write_many
+from core.engine.views import DetailUser
+
+psql.extras.register_uuid()
+
+EMAIL = 'benchmark@local'
+USER_TEAMS = 5
+HUBS_PER_TEAM = 3
+MEMBERS_PER_TEAM = 10
+TEAM_STEPS = [0, 1000, 10000, 50000]
+ITERATIONS = 200
+
+
+def team_entries(team_count, user_ids):
+    now = dt.datetime.now(tz=pytz.utc)
+    levels = [level.value for level in AccessLevel]
+    teams, hubs, members, roles = [], [], [], []
+
+    for _ in range(team_count):
+        team_id = uuid.uuid4()
+        teams.append(Team(team_id, f'team-{team_id}', now))
+
+        for user_id in random.sample(user_ids, min(len(user_ids), MEMBERS_PER_TEAM)):
+            members.append(TeamMember(uuid.uuid4(), team_id, user_id, now, None))
+            members.append(CurrentTeamMember(team_id, user_id, now))
+
+        for _ in range(HUBS_PER_TEAM):
+            hub_id = uuid.uuid4()
+            level = random.choice(levels)
+            hubs.append(Hub(hub_id, team_id, f'hub-{hub_id}', now))
+            roles.append(TeamRole(uuid.uuid4(), team_id, hub_id, level, now))
+            roles.append(CurrentTeamRole(team_id, hub_id, level, now))
+
+    return teams + hubs + sorted(members, key=lambda entry: entry.table_name) + \
+        sorted(roles, key=lambda entry: entry.table_name)
+
+
+def seed(cursor, team_count, user_ids):
+    write_many(cursor, team_entries(team_count, user_ids))
+    cursor.execute('ANALYZE')
+
+
+def time_login(cursor):
+    timings = []
+    for _ in range(ITERATIONS):
+        start_time = time.perf_counter()
+        DetailUser(EMAIL)._fetch(cursor)
+        timings.append((time.perf_counter() - start_time) * 1000)
+    return statistics.median(timings), max(timings)
+
+
+def main():
+    conn = psql.connect('')
+    cursor = conn.cursor()
+    now = dt.datetime.now(tz=pytz.utc)
+
+    benchmark_user_id = uuid.uuid4()
+    user_ids = [uuid.uuid4() for _ in range(5000)]
+    write_many(cursor, [
+        User(user_id, f'{user_id}@local' if user_id != benchmark_user_id else EMAIL, '', now)
+        for user_id in [benchmark_user_id, *user_ids]
+    ])
+
+    seed(cursor, USER_TEAMS, [benchmark_user_id])
+
+    print(f'{"teams":>8} {"members":>9} {"median ms":>10} {"max ms":>8}')
+    team_count = 0
+    for step in TEAM_STEPS:
+        seed(cursor, step - team_count, user_ids)
+        team_count = step
+
+        cursor.execute('SELECT count(*) FROM current_team_members')
+        member_count = cursor.fetchone()[0]
+
+        median, maximum = time_login(cursor)
+        print(f'{team_count:>8} {member_count:>9} {median:>10.3f} {maximum:>8.3f}')
+
+    roles = DetailUser(EMAIL)._fetch(cursor)['roles']
+    assert len(roles) == USER_TEAMS * HUBS_PER_TEAM, roles
+
+    conn.rollback()
+
+
+if __name__ == '__main__':
+    main()
@@ -21,6 +21,13 @@ DROP TABLE IF EXISTS partition_statuses CASCADE;
 DROP TABLE IF EXISTS connectors         CASCADE;
 DROP TABLE IF EXISTS connections        CASCADE;
 
+DROP TABLE IF EXISTS discovery_checkpoints      CASCADE;
+DROP TABLE IF EXISTS dependency_closure         CASCADE;
+DROP TABLE IF EXISTS current_published_versions CASCADE;
+DROP TABLE IF EXISTS current_team_members       CASCADE;
+DROP TABLE IF EXISTS current_team_roles         CASCADE;
+DROP TABLE IF EXISTS cache_generations          CASCADE;
+
 DROP TABLE IF EXISTS queue CASCADE;
 
 DROP TYPE IF EXISTS access_level CASCADE;
@@ -37,6 +44,8 @@ CREATE TABLE IF NOT EXISTS users (
     CONSTRAINT email_length CHECK (char_length(email) >= 2 AND char_length(email) < 1028)
 );
 
+CREATE INDEX users_email_idx ON users(email);
+
 CREATE TABLE IF NOT EXISTS teams (
     id uuid,
 
@@ -64,6 +73,19 @@ CREATE TABLE IF NOT EXISTS team_members (
 CREATE INDEX team_members_team_user_idx ON team_members(team_id, user_id);
 CREATE UNIQUE INDEX current_team_members_idx ON team_members(team_id, user_id) WHERE deleted_at IS NULL;
 
+CREATE TABLE IF NOT EXISTS current_team_members (
+    team_id uuid,
+    user_id uuid,
+
+    created_at timestamptz NOT NULL,
+
+    PRIMARY KEY (team_id, user_id),
+    FOREIGN KEY (team_id) REFERENCES teams(id),
+    FOREIGN KEY (user_id) REFERENCES users(id)
+);
+
+CREATE INDEX current_team_members_user_idx ON current_team_members(user_id);
+
 CREATE TABLE IF NOT EXISTS hubs (
     id uuid,
 
@@ -93,6 +115,20 @@ CREATE TABLE IF NOT EXISTS team_roles (
 
 CREATE INDEX team_roles_team_hub_idx ON team_roles(team_id, hub_id);
 
+CREATE TABLE IF NOT EXISTS current_team_roles (
+    team_id uuid,
+    hub_id  uuid,
+
+    access_level access_level NOT NULL,
+    created_at   timestamptz  NOT NULL,
+
+    PRIMARY KEY (team_id, hub_id),
+    FOREIGN KEY (team_id) REFERENCES teams(id),
+    FOREIGN KEY (hub_id) REFERENCES hubs(id)
+);
+
+CREATE INDEX current_team_roles_hub_idx ON current_team_roles(hub_id);
+
 CREATE TABLE IF NOT EXISTS datasets (
     hub_id uuid,
     id     uuid,
@@ -108,6 +144,7 @@ CREATE TABLE IF NOT EXISTS datasets (
 );
 
 CREATE UNIQUE INDEX current_dataset_names_idx ON datasets(hub_id, name) WHERE deleted_at IS NULL;
+CREATE INDEX current_datasets_created_at_idx ON datasets(hub_id, created_at, id) WHERE deleted_at IS NULL;
 
 CREATE TABLE IF NOT EXISTS backends (
     id int,
@@ -136,6 +173,8 @@ CREATE TABLE IF NOT EXISTS dataset_versions (
     CONSTRAINT positive_version CHECK (version >= 0)
 );
 
+CREATE INDEX dataset_versions_created_at_idx ON dataset_versions(hub_id, dataset_id, created_at, version);
+
 CREATE TABLE IF NOT EXISTS dependencies (
     parent_hub_id     uuid,
     parent_dataset_id uuid,
@@ -152,6 +191,24 @@ CREATE TABLE IF NOT EXISTS dependencies (
 
 CREATE INDEX child_dependencies_idx ON dependencies(child_hub_id, child_dataset_id, child_version);
 
+CREATE TABLE IF NOT EXISTS dependency_closure (
+    ancestor_hub_id       uuid,
+    ancestor_dataset_id   uuid,
+    ancestor_version      int,
+    descendant_hub_id     uuid,
+    descendant_dataset_id uuid,
+    descendant_version    int,
+
+    depth int NOT NULL,
+
+    PRIMARY KEY (ancestor_hub_id, ancestor_dataset_id, ancestor_version, descendant_hub_id, descendant_dataset_id, descendant_version),
+    FOREIGN KEY (ancestor_hub_id, ancestor_dataset_id, ancestor_version) REFERENCES dataset_versions(hub_id, dataset_id, version),
+    FOREIGN KEY (descendant_hub_id, descendant_dataset_id, descendant_version) REFERENCES dataset_versions(hub_id, dataset_id, version),
+    CONSTRAINT positive_depth CHECK (depth > 0)
+);
+
+CREATE INDEX descendant_dependency_closure_idx ON dependency_closure(descendant_hub_id, descendant_dataset_id, descendant_version);
+
 CREATE TABLE IF NOT EXISTS types (
     id int,
 
@@ -192,6 +249,17 @@ CREATE TABLE IF NOT EXISTS published_versions (
     FOREIGN KEY (hub_id, dataset_id, version) REFERENCES dataset_versions(hub_id, dataset_id, version)
 );
 
+CREATE TABLE IF NOT EXISTS current_published_versions (
+    hub_id     uuid,
+    dataset_id uuid,
+
+    version      int         NOT NULL,
+    published_at timestamptz NOT NULL,
+
+    PRIMARY KEY (hub_id, dataset_id),
+    FOREIGN KEY (hub_id, dataset_id, version) REFERENCES dataset_versions(hub_id, dataset_id, version)
+);
+
 CREATE TABLE IF NOT EXISTS partitions (
     id uuid,
 
@@ -201,6 +269,8 @@ CREATE TABLE IF NOT EXISTS partitions (
     partition_values text[],
     path             text        NOT NULL,
     row_count        int,
+    byte_count       bigint,
+    file_count       int,
     start_time       timestamptz,
     end_time         timestamptz,
     created_at       timestamptz NOT NULL,
@@ -209,12 +279,18 @@ CREATE TABLE IF NOT EXISTS partitions (
     PRIMARY KEY (id),
     FOREIGN KEY (hub_id, dataset_id, version) REFERENCES dataset_versions(hub_id, dataset_id, version),
     CONSTRAINT positive_count CHECK (row_count >= 0),
+    CONSTRAINT positive_byte_count CHECK (byte_count >= 0),
+    CONSTRAINT positive_file_count CHECK (file_count >= 0),
     CONSTRAINT end_time_greater CHECK (start_time IS NULL OR end_time IS NULL OR end_time > start_time),
     CONSTRAINT deleted_at_greater CHECK (deleted_at IS NULL OR deleted_at > created_at)
 );
 
 CREATE INDEX partitions_values_idx ON partitions USING gin(partition_values);
 CREATE INDEX version_partitions_idx ON partitions(hub_id, dataset_id, version);
+CREATE INDEX version_partitions_path_idx ON partitions(hub_id, dataset_id, version, path, id);
+CREATE INDEX version_partitions_start_time_idx ON partitions(hub_id, dataset_id, version, start_time, id);
+CREATE INDEX version_partitions_end_time_idx ON partitions(hub_id, dataset_id, version, end_time, id);
+CREATE INDEX version_partitions_created_at_idx ON partitions(hub_id, dataset_id, version, created_at, id);
 CREATE UNIQUE INDEX current_partition_paths_idx ON partitions(hub_id, dataset_id, version, path) WHERE deleted_at IS NULL;
 CREATE UNIQUE INDEX current_partition_values_idx ON partitions(hub_id, dataset_id, version, partition_values) WHERE deleted_at IS NULL;
 
@@ -255,33 +331,39 @@ CREATE TABLE IF NOT EXISTS connections (
     FOREIGN KEY (connector_id) REFERENCES connectors(id)
 );
 
+CREATE TABLE IF NOT EXISTS discovery_checkpoints (
+    hub_id     uuid,
+    dataset_id uuid,
+    version    int,
+    path       text,
+
+    mtime_ns   bigint      NOT NULL,
+    updated_at timestamptz NOT NULL,
+
+    PRIMARY KEY (hub_id, dataset_id, version, path),
+    FOREIGN KEY (hub_id, dataset_id, version) REFERENCES dataset_versions(hub_id, dataset_id, version)
+);
+
+CREATE TABLE IF NOT EXISTS cache_generations (
+    scope text,
+
+    generation bigint NOT NULL,
+
+    PRIMARY KEY (scope)
+);
+
 CREATE OR REPLACE VIEW current_team_members_with_email AS
-    WITH ranked AS (
-        SELECT
-            team_id,
-            user_id,
-            created_at,
-            ROW_NUMBER()
-            OVER (
-                PARTITION BY team_id, user_id
-                ORDER BY created_at DESC
-            ) idx
-        FROM team_members
-        WHERE deleted_at IS NULL
-    )
     SELECT
-        ran.team_id,
-        ran.user_id,
+        mem.team_id,
+        mem.user_id,
         usr.email AS user_email,
-        ran.created_at
+        mem.created_at
     FROM
-        ranked ran
+        current_team_members mem
     INNER JOIN
         users AS usr
     ON
-        ran.user_id = usr.id
-    WHERE
-        ran.idx = 1;
+        mem.user_id = usr.id;
 
 CREATE OR REPLACE VIEW hubs_with_team_name AS
     SELECT
@@ -298,55 +380,18 @@ CREATE OR REPLACE VIEW hubs_with_team_name AS
         hub.team_id = tea.id;
 
 CREATE OR REPLACE VIEW current_team_roles_with_name AS
-    WITH ranked AS (
-        SELECT
-            team_id,
-            hub_id,
-            access_level,
-            created_at,
-            ROW_NUMBER()
-            OVER (
-                PARTITION BY team_id, hub_id
-                ORDER BY created_at DESC
-            ) idx
-        FROM team_roles
-    )
     SELECT
-        ran.team_id,
-        ran.hub_id,
+        rol.team_id,
+        rol.hub_id,
         hub.name AS hub_name,
-        ran.access_level,
-        ran.created_at
+        rol.access_level,
+        rol.created_at
     FROM
-        ranked ran
+        current_team_roles rol
     INNER JOIN
         hubs hub
     ON
-        ran.hub_id = hub.id
-    WHERE
-        ran.idx = 1;
-
-CREATE OR REPLACE VIEW current_published_versions AS
-    WITH ranked AS (
-        SELECT
-            pub.hub_id,
-            pub.dataset_id,
-            pub.version,
-            pub.published_at,
-            ROW_NUMBER()
-            OVER (
-                PARTITION BY pub.hub_id, pub.dataset_id
-                ORDER BY pub.published_at DESC
-            ) idx
-        FROM published_versions pub
-    )
-    SELECT
-        ran.hub_id,
-        ran.dataset_id,
-        ran.version,
-        ran.published_at
-    FROM ranked ran
-    WHERE ran.idx = 1;
+        rol.hub_id = hub.id;
 
 CREATE OR REPLACE VIEW current_published_versions_with_names AS
     SELECT
@@ -359,7 +404,7 @@ CREATE OR REPLACE VIEW current_published_versions_with_names AS
     FROM
         current_published_versions as pub
     INNER JOIN hubs hub ON pub.hub_id = hub.id
-    INNER JOIN datasets dat ON pub.dataset_id = dat.id;
+    INNER JOIN datasets dat ON pub.hub_id = dat.hub_id AND pub.dataset_id = dat.id;
 
 
 CREATE OR REPLACE VIEW datasets_with_current_versions AS
@@ -373,7 +418,7 @@ CREATE OR REPLACE VIEW datasets_with_current_versions AS
     FROM
         datasets dat
     LEFT JOIN
-        current_published_versions pub ON dat.id = pub.dataset_id
+        current_published_versions pub ON dat.hub_id = pub.hub_id AND dat.id = pub.dataset_id
     WHERE dat.deleted_at IS NULL;
 
 CREATE OR REPLACE VIEW versions_with_backend AS
@@ -409,29 +454,17 @@ CREATE OR REPLACE VIEW columns_with_type AS
     INNER JOIN
         types typ ON col.type_id = typ.id;
 
-CREATE OR REPLACE VIEW partitions_with_last_end_time AS
-    SELECT
-        par.hub_id,
-        par.dataset_id,
-        par.version,
-        par.id,
-        par.start_time,
-        par.end_time,
-        LAG(par.end_time, 1) OVER (
-            PARTITION BY par.hub_id, par.dataset_id, par.version
-            ORDER BY par.start_time
-        ) last_end_time
-    FROM
-        partitions par;
-
 CREATE OR REPLACE VIEW partitions_with_status AS
     SELECT
+        par.id,
         par.hub_id,
         par.dataset_id,
         par.version,
         par.partition_values,
         par.path,
         par.row_count,
+        par.byte_count,
+        par.file_count,
         par.start_time,
         par.end_time,
         par.created_at,
@@ -445,7 +478,8 @@ CREATE OR REPLACE VIEW partitions_with_status AS
     LEFT JOIN
         partition_statuses pst
     ON
-        par.id = pst.partition_id;
+        par.id = pst.partition_id
+    WHERE par.deleted_at IS NULL;
 
 CREATE OR REPLACE VIEW connections_with_connector AS
     SELECT
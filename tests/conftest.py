@@ -0,0 +1,43 @@
+import socket
+
+import boto3
+import psycopg2 as psql
+import psycopg2.extras
+import pytest
+from moto.server import ThreadedMotoServer
+
+psql.extras.register_uuid()
+
+
+@pytest.fixture
+def cursor():
+    conn = psql.connect('')
+    try:
+        yield conn.cursor()
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(scope='session')
+def s3_endpoint_url():
+    port = free_port()
+    server = ThreadedMotoServer(ip_address='127.0.0.1', port=port, verbose=False)
+    server.start()
+    yield f'http://127.0.0.1:{port}'
+    server.stop()
+
+
+@pytest.fixture
+def s3(s3_endpoint_url, monkeypatch):
+    monkeypatch.setenv('S3_ENDPOINT_URL', s3_endpoint_url)
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'us-east-1')
+    return boto3.client('s3', endpoint_url=s3_endpoint_url)
@@ -0,0 +1,83 @@
+import uuid
+
+import flask_jwt_extended as flask_jwt
+import psycopg2 as psql
+import pytest
+
+import web
+from core.engine.actions import NewDataset, NewDatasetVersion, NewHub, NewTeam
+
+
+@pytest.fixture
+def version():
+    conn = psql.connect('')
+    try:
+        cursor = conn.cursor()
+        team_id = NewTeam(f'team-{uuid.uuid4().hex[:8]}').execute(cursor)
+        hub_id = NewHub(team_id, f'hub-{uuid.uuid4().hex[:8]}').execute(cursor)
+        dataset_id = NewDataset(hub_id, f'dataset-{uuid.uuid4().hex[:8]}').execute(cursor)
+        version = NewDatasetVersion(hub_id, dataset_id, 'backends.fs', '/tmp/table', ['d'],
+                                    '', False, [], []).execute(cursor)
+        conn.commit()
+    finally:
+        conn.close()
+    return hub_id, dataset_id, version
+
+
+@pytest.fixture
+def bulk(version):
+    app = web.create_app()
+    hub_id, dataset_id, version_id = version
+    with app.test_request_context():
+        token = flask_jwt.create_access_token(str(uuid.uuid4()), user_claims={str(hub_id): 'admin'})
+
+    client = app.test_client()
+    url = f'/hubs/{hub_id}/datasets/{dataset_id}/versions/{version_id}/partitions/bulk.json'
+    return lambda rows: client.post(url, json=rows, headers={'Authorization': f'Bearer {token}'})
+
+
+def row(day, **fields):
+    return {
+        'path': f'/tmp/table/d={day}',
+        'partition_values': [str(day)],
+        'start_time': f'2020-01-0{day}T00:00:00+00:00',
+        'end_time': f'2020-01-0{day + 1}T00:00:00+00:00',
+        **fields,
+    }
+
+
+def test_bulk_reports_conflicts(bulk):
+    response = bulk([row(1), row(2)])
+    assert response.status_code == 201
+    assert [created['index'] for created in response.json['created']] == [0, 1]
+
+    response = bulk([row(1), row(3)])
+    assert response.status_code == 201
+    assert [created['index'] for created in response.json['created']] == [1]
+    assert [(conflict['index'], conflict['path']) for conflict in response.json['conflicts']] == [(0, '/tmp/table/d=1')]
+
+    response = bulk([row(1), row(2), row(3)])
+    assert response.status_code == 200
+    assert len(response.json['conflicts']) == 3
+
+
+def test_bulk_rejects_overlapping_partitions(bulk):
+    assert bulk([row(1)]).status_code == 201
+
+    response = bulk([row(4), row(1, path='/tmp/table/other', partition_values=['other'])])
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('fields, error', [
+    ({'partition_values': 'abc'}, 'item 1: partition_values must be a list of strings'),
+    ({'path': 7}, 'item 1: path must be a non-empty string'),
+    ({'row_count': '10'}, 'item 1: row_count must be a non-negative integer'),
+    ({'start_time': 'yesterday'}, 'item 1: start_time must be an ISO 8601 timestamp'),
+    ({'end_time': '2020-01-05T00:00:00+00:00'}, 'item 1: end_time must be after start_time'),
+])
+def test_bulk_rejects_malformed_rows(bulk, fields, error):
+    response = bulk([row(1), row(5, **fields)])
+    assert response.status_code == 400
+    assert response.json == {'error': error}
+
+    assert bulk([row(1)]).status_code == 201
@@ -0,0 +1,90 @@
+import uuid
+
+import pytest
+
+import backends.s3 as s3_backend
+from core.data import Status
+from core.engine.actions import NewDataset, NewDatasetVersion, NewHub, NewPartition, NewTeam
+from core.engine.views import DetailVersion
+
+LARGE_PARTITION_COUNT = 1100
+
+
+@pytest.fixture
+def bucket(s3):
+    name = f'data-hub-{uuid.uuid4().hex[:12]}'
+    s3.create_bucket(Bucket=name)
+
+    keys = [f'table/c=0/d={d}/part-0.csv' for d in range(LARGE_PARTITION_COUNT)]
+    keys += [
+        'table/c=1/d=0/part-0.csv',
+        'table/c=1/d=0/part-1.csv',
+        'table/c=1/d=0/_SUCCESS',
+        'table/c=1/d=0/_temporary/0/part-2.csv',
+        'table/c=1/d=0/.spark-staging/part-3.csv',
+        'table/c=1/_temporary/0/d=9/part-0.csv',
+        'table/_temporary/c=2/d=0/part-0.csv',
+    ]
+    for key in keys:
+        s3.put_object(Bucket=name, Key=key, Body=b'a,b\n1,2\n')
+
+    return name
+
+
+@pytest.fixture
+def version(cursor, bucket):
+    team_id = NewTeam(f'team-{uuid.uuid4().hex[:8]}').execute(cursor)
+    hub_id = NewHub(team_id, f'hub-{uuid.uuid4().hex[:8]}').execute(cursor)
+    dataset_id = NewDataset(hub_id, f'dataset-{uuid.uuid4().hex[:8]}').execute(cursor)
+    version = NewDatasetVersion(hub_id, dataset_id, 'backends.s3', f's3://{bucket}/table', ['c', 'd'],
+                                '', False, [], []).execute(cursor)
+    return hub_id, dataset_id, version
+
+
+def partitions(cursor, version):
+    return {
+        partition['path']: partition
+        for partition in DetailVersion(*version).fetch(cursor)['partitions']
+    }
+
+
+def test_discover_partitions(cursor, bucket, version):
+    s3_backend.discover_partitions(cursor, *version)
+
+    discovered = partitions(cursor, version)
+    assert len(discovered) == LARGE_PARTITION_COUNT + 1
+    assert discovered[f's3://{bucket}/table/c=0/d={LARGE_PARTITION_COUNT - 1}']['partition_values'] == \
+        ['0', str(LARGE_PARTITION_COUNT - 1)]
+    assert discovered[f's3://{bucket}/table/c=1/d=0']['partition_values'] == ['1', '0']
+    assert not any('_temporary' in path for path in discovered)
+
+
+def test_discover_partitions_is_idempotent(cursor, bucket, version):
+    s3_backend.discover_partitions(cursor, *version)
+    s3_backend.discover_partitions(cursor, *version)
+
+    assert len(partitions(cursor, version)) == LARGE_PARTITION_COUNT + 1
+
+
+def test_verify_partitions(cursor, bucket, version):
+    s3_backend.discover_partitions(cursor, *version)
+    NewPartition(*version, f's3://{bucket}/table/c=1/d=1', ['1', '1'], None, None, None).execute(cursor)
+    NewPartition(*version, '/local/table/c=1/d=2', ['1', '2'], None, None, None).execute(cursor)
+
+    s3_backend.verify_partitions(cursor, *version)
+
+    verified = partitions(cursor, version)
+    assert sum(1 for partition in verified.values() if partition['status'] == Status.OK.value) == \
+        LARGE_PARTITION_COUNT + 1
+
+    last = verified[f's3://{bucket}/table/c=0/d={LARGE_PARTITION_COUNT - 1}']
+    assert (last['byte_count'], last['file_count']) == (8, 1)
+
+    with_hidden = verified[f's3://{bucket}/table/c=1/d=0']
+    assert (with_hidden['byte_count'], with_hidden['file_count']) == (16, 2)
+
+    missing = verified[f's3://{bucket}/table/c=1/d=1']
+    assert missing['status'] == Status.ERROR.value
+    assert missing['byte_count'] is None
+
+    assert verified['/local/table/c=1/d=2']['status'] == Status.ERROR.value
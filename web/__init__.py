@@ -1,5 +1,6 @@
 import datetime as dt
 import logging as std_logging
+import os
 import time
 import sys
 import uuid
@@ -7,12 +8,12 @@ import uuid
 import flask
 import flask_jwt_extended as flask_jwt
 import jwt
-import psycopg2 as psql
-import psycopg2.pool
 import structlog
 
-from core.engine import logging
+from core.engine import cache, logging, security
 from web.db import AssertionFailure, DbException
+from web.paging import InvalidPageRequest
+from web.pool import ConnectionPool, PoolTimeout
 
 
 def format_datetime(value):
@@ -21,6 +22,15 @@ def format_datetime(value):
     return ''
 
 
+def format_filesize(value):
+    if value is None:
+        return ''
+    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+        if value < 1024 or unit == 'TB':
+            return f'{value:.0f} {unit}' if unit == 'B' else f'{value:.1f} {unit}'
+        value /= 1024
+
+
 def format_tooltip(partition):
     tooltip = f'pos:left; title:{partition["status"].capitalize()}'
     if partition['updated_at']:
@@ -42,8 +52,16 @@ def create_app():
     app.config['JWT_COOKIE_SECURE'] = False
     app.config['JWT_COOKIE_CSRF_PROTECT'] = False
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = dt.timedelta(hours=12)
+    app.config['JWT_COMPACT_ROLES'] = os.environ.get('JWT_ROLE_CLAIMS', 'full') == 'compact'
 
-    app.config['db_pool'] = psql.pool.SimpleConnectionPool(1, 20, '')
+    app.config['db_pool'] = ConnectionPool(1, 20, '', max_wait=10.0, recycle=3600.0)
+
+    cache.configure(os.environ.get('CACHE_BACKEND', 'local'),
+                    address=os.environ.get('CACHE_ADDRESS', cache.DEFAULT_ADDRESS),
+                    authkey=os.environ.get('CACHE_AUTHKEY', '').encode('utf-8'),
+                    max_entries=int(os.environ.get('CACHE_MAX_ENTRIES', cache.DEFAULT_MAX_ENTRIES)),
+                    ttl=float(os.environ.get('CACHE_TTL', cache.DEFAULT_TTL)))
+    app.config['role_cache'] = cache.LocalCache(max_entries=int(os.environ.get('ROLE_CACHE_MAX_ENTRIES', 1000)))
 
     flask_jwt.JWTManager(app)
 
@@ -71,7 +89,11 @@ def create_app():
     from . import connections
     app.register_blueprint(connections.bp)
 
+    from . import metrics
+    app.register_blueprint(metrics.bp)
+
     app.jinja_env.filters['datetime'] = format_datetime
+    app.jinja_env.filters['filesize'] = format_filesize
     app.jinja_env.filters['tooltip'] = format_tooltip
 
     @app.before_request
@@ -117,6 +139,7 @@ def create_app():
     def close_db_pool(e):
         db = flask.g.pop('db', None)
         if db is not None:
+            cache.discard(db)
             app.config['db_pool'].putconn(db)
 
     @app.errorhandler(DbException)
@@ -125,12 +148,23 @@ def create_app():
             return flask.render_template('error.html.j2', error=str(error)), 500
         return flask.jsonify({'error': str(error)}), 500
 
+    @app.errorhandler(PoolTimeout)
+    @app.errorhandler(security.Overloaded)
+    def handle_overloaded(error):
+        if flask.request.url.endswith('html'):
+            return flask.render_template('error.html.j2', error=str(error)), 503
+        return flask.jsonify({'error': str(error)}), 503
+
     @app.errorhandler(AssertionFailure)
     def handle_assertion_failure(error):
         if flask.request.url.endswith('html'):
             return flask.render_template('error.html.j2', error=str(error)), error.status_code
         return flask.jsonify({'error': str(error)}), error.status_code
 
+    @app.errorhandler(InvalidPageRequest)
+    def handle_invalid_page_request(error):
+        return flask.jsonify({'error': str(error)}), 400
+
     @app.route('/', methods=['GET'])
     def redirect_index():
         return flask.redirect(flask.url_for('hubs.index_html'))
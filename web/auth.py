@@ -1,16 +1,58 @@
 import functools
+import uuid
 
 import flask
 import flask_jwt_extended as flask_jwt
 
 from core.data import AccessLevel
+from core.engine import cache
+from core.engine.actions import UpdatePasswordHash
 from core.engine.assertions import CorrectPassword
-from core.engine.views import DetailUser
-from web.db import AssertionFailure, check_assertion, fetch_view
+from core.engine.views import DetailUser, UserRoles
+from web.db import AssertionFailure, check_assertion, execute_action, fetch_generations, fetch_view
 
 bp = flask.Blueprint('auth', __name__, url_prefix='/auth')
 
 
+def check_password(email, password):
+    correct_password = CorrectPassword(email, password)
+    check_assertion(correct_password)
+    if correct_password.new_hash:
+        execute_action(UpdatePasswordHash(email, correct_password.new_hash))
+
+
+def role_version(user_id):
+    return fetch_generations([cache.roles_scope(user_id)])[-1]
+
+
+def create_access_token(details):
+    if flask.current_app.config['JWT_COMPACT_ROLES']:
+        claims = {'role_version': role_version(details['user_id'])}
+    else:
+        claims = details['roles']
+    return flask_jwt.create_access_token(details['user_id'], user_claims=claims)
+
+
+def lookup_roles(user_id):
+    role_cache = flask.current_app.config['role_cache']
+    key = (user_id, fetch_generations([cache.roles_scope(user_id)]))
+    roles = role_cache.get(key)
+    if roles is None:
+        roles = fetch_view(UserRoles(uuid.UUID(user_id)))['roles']
+        role_cache.set(key, roles)
+    return roles
+
+
+def current_roles():
+    if 'roles' not in flask.g:
+        claims = flask_jwt.get_jwt_claims()
+        if 'role_version' in claims:
+            flask.g.roles = lookup_roles(flask_jwt.get_jwt_identity())
+        else:
+            flask.g.roles = claims
+    return flask.g.roles
+
+
 @bp.route('/login.json', methods=['POST'])
 def login_json():
     data = flask.request.json
@@ -20,11 +62,10 @@ def login_json():
     if not email or not password:
         return flask.jsonify({}), 401
 
-    check_assertion(CorrectPassword(email, password))
+    check_password(email, password)
     details = fetch_view(DetailUser(email))
     return flask.jsonify({
-        'access_token': flask_jwt.create_access_token(details['user_id'],
-                                                      user_claims=details['roles'])
+        'access_token': create_access_token(details)
     })
 
 
@@ -35,11 +76,10 @@ def login_html():
     if flask.request.method == 'POST':
         data = flask.request.form
         try:
-            check_assertion(CorrectPassword(data['email'], data['password']))
+            check_password(data['email'], data['password'])
 
             details = fetch_view(DetailUser(data['email']))
-            access_token = flask_jwt.create_access_token(details['user_id'],
-                                                         user_claims=details['roles'])
+            access_token = create_access_token(details)
 
             response = flask.redirect(flask.url_for('hubs.index_html'))
             flask_jwt.set_access_cookies(response, access_token)
@@ -52,15 +92,20 @@ def login_html():
     return flask.render_template('auth/login.html.j2', error=error)
 
 
+def readable_hub_ids():
+    roles = current_roles()
+    return sorted(uuid.UUID(hub_id) for hub_id, level in roles.items() if AccessLevel.can_read(level))
+
+
 def is_current_hub_reader():
     hub_id = str(flask.request.view_args['hub_id'])
-    roles = flask_jwt.get_jwt_claims()
+    roles = current_roles()
     return AccessLevel.can_read(roles.get(str(hub_id), 'none'))
 
 
 def is_current_hub_writer():
     hub_id = str(flask.request.view_args['hub_id'])
-    roles = flask_jwt.get_jwt_claims()
+    roles = current_roles()
     return AccessLevel.can_write(roles.get(str(hub_id), 'none'))
 
 
@@ -4,7 +4,8 @@ from core.engine.actions import NewDataset
 from core.engine.assertions import HubExists
 from core.engine.views import DetailHub, ListDatasets
 from web.auth import auth_current_hub_reader, is_current_hub_writer, require_writer
-from web.db import DbException, check_assertion, fetch_view, execute_action
+from web.db import DbException, check_assertion, fetch_json, fetch_view, execute_action
+from web.paging import page_args
 
 bp = flask.Blueprint('datasets', __name__, url_prefix='/hubs/<uuid:hub_id>/datasets')
 
@@ -17,7 +18,7 @@ def authorize_before_request():
 @bp.route('/index.json', methods=['GET'])
 def index_json(hub_id):
     check_assertion(HubExists(hub_id))
-    return flask.jsonify(fetch_view(ListDatasets(hub_id)))
+    return fetch_json(ListDatasets(hub_id, **page_args(flask.request.args)))
 
 
 @bp.route('/index.html', methods=['GET'])
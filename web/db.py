@@ -1,11 +1,14 @@
 import functools
+import hashlib
 
 import flask
 import pq
 import psycopg2 as psql
 import psycopg2.extras
 
-from core.job import Job
+from core.engine import cache
+from core.job import Job, QUEUE_NAME
+from web import streaming
 
 psql.extras.register_uuid()
 
@@ -35,14 +38,13 @@ class AssertionFailure(Exception):
 def connect():
     if 'db' not in flask.g:
         flask.g.db = flask.current_app.config['db_pool'].getconn()
-        flask.g.queue = pq.PQ(conn=flask.g.db)['jobs']
     return flask.g.db
 
 
 @raise_as_dbexception
 def enqueue_job(backend_id, action, config):
-    connect()
-    return flask.g.queue.put(Job(backend_id, action, config).__dict__)
+    queue = pq.PQ(conn=connect())[QUEUE_NAME]
+    return queue.put(Job(backend_id, action, config).__dict__)
 
 
 @raise_as_dbexception
@@ -52,15 +54,57 @@ def fetch_view(view):
     return view.fetch(cursor)
 
 
+@raise_as_dbexception
+def fetch_json(view, render=None, vary=()):
+    conn = connect()
+    cursor = conn.cursor()
+    render = render or (lambda result: result)
+
+    scopes = view.etag_scopes()
+    if scopes is None:
+        return streaming.jsonify(render(view.fetch(cursor)))
+
+    marker = (view.__class__.__name__, tuple(view.__dict__.items()), cache.generations(cursor, scopes), tuple(vary))
+    etag = hashlib.sha1(repr(marker).encode('utf-8')).hexdigest()
+
+    if flask.request.if_none_match.contains_weak(etag):
+        response = flask.Response(status=304)
+    else:
+        response = streaming.jsonify(render(view.fetch(cursor)))
+
+    response.set_etag(etag, weak=True)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+@raise_as_dbexception
+def fetch_generations(scopes):
+    conn = connect()
+    cursor = conn.cursor()
+    return cache.generations(cursor, scopes)
+
+
 @raise_as_dbexception
 def execute_action(action):
     conn = connect()
     cursor = conn.cursor()
     result = action.execute(cursor)
+    cache.flush(cursor)
     conn.commit()
     return result
 
 
+@raise_as_dbexception
+def execute_actions(actions):
+    conn = connect()
+    cursor = conn.cursor()
+    results = [action.execute(cursor) for action in actions]
+    cache.flush(cursor)
+    conn.commit()
+    return results
+
+
 @raise_as_dbexception
 def check_assertion(assertion):
     conn = connect()
@@ -1,28 +1,21 @@
 import flask
-import flask_jwt_extended as flask_jwt
 
-from core.data import AccessLevel
 from core.engine.actions import NewHub
 from core.engine.views import ListHubs, ListTeams
-from web.db import DbException, fetch_view, execute_action
+from web.auth import readable_hub_ids
+from web.db import DbException, fetch_json, fetch_view, execute_action
+from web.paging import page_args
 
 bp = flask.Blueprint('hubs', __name__, url_prefix='/hubs')
 
 
 def list_readable_hubs():
-    roles = flask_jwt.get_jwt_claims()
-    return {
-        'hubs': [
-            hub
-            for hub in fetch_view(ListHubs())['hubs']
-            if AccessLevel.can_read(roles.get(str(hub['id']), 'none'))
-        ]
-    }
+    return fetch_view(ListHubs(readable_hub_ids()))
 
 
 @bp.route('/index.json', methods=['GET'])
 def index_json():
-    return flask.jsonify(list_readable_hubs())
+    return fetch_json(ListHubs(readable_hub_ids(), **page_args(flask.request.args)))
 
 
 @bp.route('/index.html', methods=['GET'])
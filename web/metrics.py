@@ -0,0 +1,30 @@
+import flask
+
+from core.engine import cache, security, statements
+
+bp = flask.Blueprint('metrics', __name__, url_prefix='/metrics')
+
+
+@bp.route('/statements.json', methods=['GET'])
+def statements_json():
+    return flask.jsonify({'statements': statements.stats()})
+
+
+@bp.route('/passwords.json', methods=['GET'])
+def passwords_json():
+    return flask.jsonify(security.stats())
+
+
+@bp.route('/pool.json', methods=['GET'])
+def pool_json():
+    return flask.jsonify(flask.current_app.config['db_pool'].stats())
+
+
+@bp.route('/cache.json', methods=['GET'])
+def cache_json():
+    return flask.jsonify(cache.stats())
+
+
+@bp.route('/roles.json', methods=['GET'])
+def roles_json():
+    return flask.jsonify(flask.current_app.config['role_cache'].stats())
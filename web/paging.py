@@ -0,0 +1,21 @@
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class InvalidPageRequest(Exception):
+    pass
+
+
+def parse_int(value, default, maximum):
+    try:
+        return max(0, min(int(value), maximum)) if value is not None else default
+    except ValueError:
+        raise InvalidPageRequest(f'invalid integer: {value}')
+
+
+def page_args(args):
+    limit = parse_int(args.get('limit'), None, MAX_PAGE_SIZE)
+    return {
+        'limit': max(1, limit) if limit is not None else None,
+        'offset': parse_int(args.get('offset'), 0, 2 ** 31 - 1),
+    }
@@ -1,11 +1,21 @@
+import base64
 import datetime as dt
+import itertools
+import json
+import uuid
 
 import flask
 
-from core.engine.actions import NewPartition
-from core.engine.assertions import VersionExists
+from core.data import Status
+from core.engine.actions import NewPartition, NewPartitions
+from core.engine.assertions import NoOverlappingPartitions, VersionExists
+from core.engine.views import PARTITION_ORDERS, PagePartitions
+from web import format_datetime, format_filesize
 from web.auth import auth_current_hub_reader, require_writer
-from web.db import check_assertion, execute_action
+from web.db import check_assertion, execute_action, execute_actions, fetch_json
+from web.paging import MAX_PAGE_SIZE, PAGE_SIZE, InvalidPageRequest, parse_int
+
+BULK_CHUNK_SIZE = 1000
 
 bp = flask.Blueprint('partitions', __name__,
                      url_prefix='/hubs/<uuid:hub_id>/datasets/<uuid:dataset_id>/versions/<int:version>/partitions')
@@ -16,11 +26,134 @@ def authorize_before_request():
     return auth_current_hub_reader()
 
 
+class InvalidBulkRequest(Exception):
+    pass
+
+
+@bp.errorhandler(InvalidBulkRequest)
+def handle_invalid_bulk_request(error):
+    return flask.jsonify({'error': str(error)}), 400
+
+
+def encode_cursor(order_by, descending, after):
+    data = json.dumps([order_by, descending, *after], default=str)
+    return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    try:
+        order_by, descending, value, partition_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return order_by, descending, (value, uuid.UUID(partition_id))
+    except (TypeError, ValueError):
+        raise InvalidPageRequest('invalid cursor')
+
+
+def parse_time(value):
+    if not value:
+        return None
+    try:
+        return dt.datetime.fromisoformat(value)
+    except ValueError:
+        raise InvalidPageRequest(f'invalid time: {value}')
+
+
+def page_filters(args, values):
+    status = args.get('status') or None
+    if status is not None and status not in {s.value for s in Status}:
+        raise InvalidPageRequest(f'invalid status: {status}')
+
+    return {
+        'values': values,
+        'status': status,
+        'from_time': parse_time(args.get('from')),
+        'to_time': parse_time(args.get('to')),
+    }
+
+
+@bp.route('/index.json', methods=['GET'])
+def index_json(hub_id, dataset_id, version):
+    check_assertion(VersionExists(hub_id, dataset_id, version))
+    args = flask.request.args
+
+    if args.get('cursor'):
+        order_by, descending, after = decode_cursor(args['cursor'])
+    else:
+        order_by, descending, after = args.get('order_by', 'end_time'), args.get('direction') == 'desc', None
+
+    if order_by not in PARTITION_ORDERS:
+        raise InvalidPageRequest(f'cannot order partitions by {order_by}')
+
+    def render(page):
+        next_cursor = None
+        if page['next'] is not None:
+            next_cursor = encode_cursor(order_by, descending, page['next'])
+        return {'partitions': page['partitions'], 'cursor': next_cursor}
+
+    return fetch_json(PagePartitions(hub_id,
+                                     dataset_id,
+                                     version,
+                                     order_by=order_by,
+                                     descending=descending,
+                                     limit=max(1, parse_int(args.get('limit'), PAGE_SIZE, MAX_PAGE_SIZE)),
+                                     after=after,
+                                     **page_filters(args, args.getlist('value'))),
+                      render=render)
+
+
+@bp.route('/table.json', methods=['GET'])
+def table_json(hub_id, dataset_id, version):
+    check_assertion(VersionExists(hub_id, dataset_id, version))
+    args = flask.request.args
+
+    order_column = args.get('order[0][column]')
+    order_by = args.get(f'columns[{order_column}][name]', 'end_time')
+    if order_by not in PARTITION_ORDERS:
+        order_by = 'end_time'
+
+    draw = parse_int(args.get('draw'), 0, 2 ** 31 - 1)
+
+    def render(page):
+        return {
+            'draw': draw,
+            'recordsTotal': page['total'],
+            'recordsFiltered': page['filtered'],
+            'data': [
+                [
+                    *partition['partition_values'],
+                    partition['path'],
+                    partition['row_count'],
+                    format_filesize(partition['byte_count']),
+                    partition['file_count'],
+                    format_datetime(partition['start_time']),
+                    format_datetime(partition['end_time']),
+                    format_datetime(partition['created_at']),
+                    flask.render_template('partitions/status.html.j2', partition=partition),
+                ]
+                for partition in page['partitions']
+            ],
+        }
+
+    return fetch_json(PagePartitions(hub_id,
+                                     dataset_id,
+                                     version,
+                                     order_by=order_by,
+                                     descending=args.get('order[0][dir]') == 'desc',
+                                     limit=max(1, parse_int(args.get('length'), PAGE_SIZE, MAX_PAGE_SIZE)),
+                                     offset=parse_int(args.get('start'), 0, 2 ** 31 - 1),
+                                     count=True,
+                                     **page_filters(args, args.get('search[value]', '').split())),
+                      render=render,
+                      vary=[draw])
+
+
 @bp.route('/new.json', methods=['POST'])
 @require_writer
 def new_json(hub_id, dataset_id, version):
     check_assertion(VersionExists(hub_id, dataset_id, version))
     data = flask.request.json
+    check_assertion(NoOverlappingPartitions(hub_id, dataset_id, version, [
+        (data.get('path'), data.get('partition_values'), data.get('start_time'), data.get('end_time'))
+    ]))
     partition_id = execute_action(
         NewPartition(hub_id,
                      dataset_id,
@@ -34,6 +167,105 @@ def new_json(hub_id, dataset_id, version):
     return flask.jsonify({'partition_id': partition_id}), 201
 
 
+def bulk_time(data, field, location):
+    value = data.get(field)
+    if value is None:
+        return None
+    try:
+        return dt.datetime.fromisoformat(value[:-1] + '+00:00' if value.endswith('Z') else value)
+    except (AttributeError, TypeError, ValueError):
+        raise InvalidBulkRequest(f'{location}: {field} must be an ISO 8601 timestamp')
+
+
+def bulk_row(data, location):
+    if not isinstance(data, dict) or 'path' not in data or 'partition_values' not in data:
+        raise InvalidBulkRequest(f'{location}: expected an object with path and partition_values')
+    if not isinstance(data['path'], str) or not data['path']:
+        raise InvalidBulkRequest(f'{location}: path must be a non-empty string')
+    values = data['partition_values']
+    if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+        raise InvalidBulkRequest(f'{location}: partition_values must be a list of strings')
+    row_count = data.get('row_count')
+    if row_count is not None and (isinstance(row_count, bool) or not isinstance(row_count, int) or row_count < 0):
+        raise InvalidBulkRequest(f'{location}: row_count must be a non-negative integer')
+
+    start_time, end_time = bulk_time(data, 'start_time', location), bulk_time(data, 'end_time', location)
+    if start_time is not None and end_time is not None:
+        try:
+            ordered = start_time < end_time
+        except TypeError:
+            raise InvalidBulkRequest(f'{location}: start_time and end_time must both have a timezone or neither')
+        if not ordered:
+            raise InvalidBulkRequest(f'{location}: end_time must be after start_time')
+
+    return {
+        'path': data['path'],
+        'partition_values': values,
+        'row_count': row_count,
+        'start_time': start_time,
+        'end_time': end_time,
+    }
+
+
+def read_bulk_partitions():
+    if flask.request.mimetype == 'application/x-ndjson':
+        for number, line in enumerate(flask.request.stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError:
+                raise InvalidBulkRequest(f'line {number}: invalid JSON')
+            yield bulk_row(data, f'line {number}')
+    else:
+        rows = flask.request.json
+        if not isinstance(rows, list):
+            raise InvalidBulkRequest('expected a JSON array of partitions')
+        for index, data in enumerate(rows):
+            yield bulk_row(data, f'item {index}')
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+@bp.route('/bulk.json', methods=['POST'])
+@require_writer
+def bulk_json(hub_id, dataset_id, version):
+    check_assertion(VersionExists(hub_id, dataset_id, version))
+
+    def actions():
+        for chunk in chunked(read_bulk_partitions(), BULK_CHUNK_SIZE):
+            check_assertion(NoOverlappingPartitions(hub_id, dataset_id, version, [
+                (data['path'], data['partition_values'], data['start_time'], data['end_time'])
+                for data in chunk
+            ]))
+            yield NewPartitions(hub_id, dataset_id, version, [
+                (data['path'],
+                 data['partition_values'],
+                 data['row_count'],
+                 data['start_time'],
+                 data['end_time'])
+                for data in chunk
+            ])
+
+    results = itertools.chain.from_iterable(execute_actions(actions()))
+
+    created, conflicts = [], []
+    for index, result in enumerate(results):
+        if 'conflict' in result:
+            conflicts.append({'index': index, **result})
+        else:
+            created.append({'index': index, **result})
+
+    return flask.jsonify({'created': created, 'conflicts': conflicts}), 201 if created else 200
+
+
 @bp.route('/new.html', methods=['POST'])
 @require_writer
 def new_html(hub_id, dataset_id, version):
@@ -53,6 +285,9 @@ def new_html(hub_id, dataset_id, version):
         else:
             end_time = dt.datetime.strptime(data['end_date'], '%Y-%m-%d')
 
+    check_assertion(NoOverlappingPartitions(hub_id, dataset_id, version, [
+        (data['path'], data.getlist('partition_values[]'), start_time, end_time)
+    ]))
     execute_action(NewPartition(hub_id,
                                 dataset_id,
                                 version,
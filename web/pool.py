@@ -0,0 +1,150 @@
+import collections as cl
+import threading
+import time
+
+import psycopg2 as psql
+import psycopg2.extensions
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+
+    def __init__(self, minconn, maxconn, dsn, max_wait=10.0, recycle=3600.0):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.dsn = dsn
+        self.max_wait = max_wait
+        self.recycle = recycle
+
+        self.condition = threading.Condition()
+        self.idle = cl.deque()
+        self.created_at = {}
+        self.in_use = 0
+        self.waiting = 0
+        self.metrics = {
+            'checkouts': 0,
+            'waits': 0,
+            'wait_ms': 0.0,
+            'timeouts': 0,
+            'opened': 0,
+            'closed': 0,
+            'failed_pings': 0,
+            'recycled': 0,
+            'rollbacks': 0,
+        }
+
+        for _ in range(minconn):
+            self.idle.append(self.__open())
+
+    def __open(self):
+        conn = psql.connect(self.dsn)
+        self.created_at[conn] = time.monotonic()
+        self.metrics['opened'] += 1
+        return conn
+
+    def __close(self, conn):
+        self.created_at.pop(conn, None)
+        self.metrics['closed'] += 1
+        try:
+            conn.close()
+        except psql.Error:
+            pass
+
+    def __is_alive(self, conn):
+        if conn.closed:
+            return False
+        try:
+            conn.cursor().execute('SELECT 1')
+            conn.rollback()
+            return True
+        except psql.Error:
+            return False
+
+    def __checkout(self):
+        deadline = time.monotonic() + self.max_wait
+        waited_from = None
+
+        with self.condition:
+            while not self.idle and self.in_use >= self.maxconn:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.metrics['timeouts'] += 1
+                    raise PoolTimeout(f'no database connection available after {self.max_wait}s')
+                if waited_from is None:
+                    waited_from = time.monotonic()
+                    self.metrics['waits'] += 1
+                self.waiting += 1
+                self.condition.wait(remaining)
+                self.waiting -= 1
+
+            if waited_from is not None:
+                self.metrics['wait_ms'] += (time.monotonic() - waited_from) * 1000
+            self.metrics['checkouts'] += 1
+            self.in_use += 1
+            return self.idle.pop() if self.idle else None
+
+    def getconn(self):
+        conn = self.__checkout()
+        try:
+            if conn is not None and time.monotonic() - self.created_at[conn] > self.recycle:
+                with self.condition:
+                    self.metrics['recycled'] += 1
+                    self.__close(conn)
+                conn = None
+
+            if conn is not None and not self.__is_alive(conn):
+                with self.condition:
+                    self.metrics['failed_pings'] += 1
+                    self.__close(conn)
+                conn = None
+
+            if conn is None:
+                conn = psql.connect(self.dsn)
+                with self.condition:
+                    self.created_at[conn] = time.monotonic()
+                    self.metrics['opened'] += 1
+
+            return conn
+        except Exception:
+            with self.condition:
+                self.in_use -= 1
+                self.condition.notify()
+            raise
+
+    def putconn(self, conn):
+        discard, rolled_back = conn.closed, False
+        if not discard and conn.info.transaction_status != psql.extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+                rolled_back = True
+            except psql.Error:
+                discard = True
+
+        with self.condition:
+            self.in_use -= 1
+            self.metrics['rollbacks'] += int(rolled_back)
+            if discard or conn not in self.created_at:
+                self.__close(conn)
+            else:
+                self.idle.append(conn)
+            self.condition.notify()
+
+    def closeall(self):
+        with self.condition:
+            while self.idle:
+                self.__close(self.idle.pop())
+
+    def stats(self):
+        with self.condition:
+            return {
+                'min': self.minconn,
+                'max': self.maxconn,
+                'idle': len(self.idle),
+                'in_use': self.in_use,
+                'waiting': self.waiting,
+                'utilisation': round(self.in_use / self.maxconn, ndigits=4),
+                **self.metrics,
+            }
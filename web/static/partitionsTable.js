@@ -0,0 +1,15 @@
+document.addEventListener('DOMContentLoaded', () => {
+    const table = document.querySelector('#partitions');
+    const headers = Array.from(table.querySelectorAll('thead th'));
+
+    $(table).DataTable({
+        'lengthChange': false,
+        'serverSide': true,
+        'processing': true,
+        'searchDelay': 500,
+        'ajax': table.dataset.source,
+        'order': [[headers.findIndex(th => th.dataset.name === 'end_time'), 'asc']],
+        'columns': headers.map(th => ({'name': th.dataset.name})),
+        'columnDefs': [{'targets': '_all', 'defaultContent': ''}],
+    });
+});
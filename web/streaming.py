@@ -0,0 +1,56 @@
+import collections.abc as cabc
+import datetime as dt
+
+import flask
+import orjson
+from werkzeug.http import http_date
+
+CHUNK_SIZE = 64 * 1024
+
+
+def http_dates(value):
+    # Match flask.json so streamed and buffered responses format dates the same way
+    if isinstance(value, dt.datetime):
+        return http_date(value.utctimetuple())
+    if isinstance(value, dt.date):
+        return http_date(value.timetuple())
+    if isinstance(value, dict):
+        return {key: http_dates(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [http_dates(item) for item in value]
+    return value
+
+
+def is_streaming(value):
+    return isinstance(value, dict) and any(isinstance(item, cabc.Iterator) for item in value.values())
+
+
+def encode(value):
+    yield b'{'
+    for index, (key, item) in enumerate(value.items()):
+        yield (b',' if index else b'') + orjson.dumps(key) + b':'
+        if isinstance(item, cabc.Iterator):
+            yield b'['
+            for position, row in enumerate(item):
+                yield (b',' if position else b'') + orjson.dumps(http_dates(row))
+            yield b']'
+        else:
+            yield orjson.dumps(http_dates(item))
+    yield b'}'
+
+
+def chunks(value):
+    buffer = bytearray()
+    for part in encode(value):
+        buffer += part
+        if len(buffer) >= CHUNK_SIZE:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+def jsonify(value):
+    if not is_streaming(value):
+        return flask.jsonify(value)
+    return flask.Response(flask.stream_with_context(chunks(value)), mimetype='application/json')
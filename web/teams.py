@@ -3,14 +3,14 @@ import flask
 from core.engine.actions import NewTeam, NewTeamMember
 from core.engine.assertions import TeamExists
 from core.engine.views import DetailTeam, ListTeams
-from web.db import check_assertion, DbException, fetch_view, execute_action
+from web.db import check_assertion, DbException, fetch_json, fetch_view, execute_action
 
 bp = flask.Blueprint('teams', __name__, url_prefix='/teams')
 
 
 @bp.route('/index.json', methods=['GET'])
 def index_json():
-    return flask.jsonify(fetch_view(ListTeams()))
+    return fetch_json(ListTeams())
 
 
 @bp.route('/index.html', methods=['GET'])
@@ -43,7 +43,7 @@ def new_html():
 @bp.route('/<uuid:team_id>/detail.json', methods=['GET'])
 def detail_json(team_id):
     check_assertion(TeamExists(team_id))
-    return flask.jsonify(fetch_view(DetailTeam(team_id)))
+    return fetch_json(DetailTeam(team_id))
 
 
 @bp.route('/<uuid:team_id>/detail.html', methods=['GET'])
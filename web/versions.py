@@ -5,7 +5,8 @@ from core.engine.actions import NewDatasetVersion, PublishVersion, SetQueuedPart
 from core.engine.assertions import DatasetExists, VersionExists
 from core.engine.views import DetailDataset, DetailVersion, ListVersions, PublishedVersions, SimpleDetailVersion
 from web.auth import auth_current_hub_reader, is_current_hub_writer, require_writer
-from web.db import DbException, check_assertion, fetch_view, enqueue_job, execute_action
+from web.db import DbException, check_assertion, fetch_json, fetch_view, enqueue_job, execute_action
+from web.paging import page_args
 
 bp = flask.Blueprint('versions', __name__, url_prefix='/hubs/<uuid:hub_id>/datasets/<uuid:dataset_id>/versions')
 
@@ -18,7 +19,7 @@ def authorize_before_request():
 @bp.route('/index.json', methods=['GET'])
 def index_json(hub_id, dataset_id):
     check_assertion(DatasetExists(hub_id, dataset_id))
-    return flask.jsonify(fetch_view(ListVersions(hub_id, dataset_id)))
+    return fetch_json(ListVersions(hub_id, dataset_id, **page_args(flask.request.args)))
 
 
 @bp.route('/index.html', methods=['GET'])
@@ -111,14 +112,14 @@ def new_html(hub_id, dataset_id):
 @bp.route('/<int:version>/detail.json', methods=['GET'])
 def detail_json(hub_id, dataset_id, version):
     check_assertion(VersionExists(hub_id, dataset_id, version))
-    return flask.jsonify(fetch_view(DetailVersion(hub_id, dataset_id, version)))
+    return fetch_json(DetailVersion(hub_id, dataset_id, version, stream=True))
 
 
 @bp.route('/<int:version>/detail.html', methods=['GET'])
 def detail_html(hub_id, dataset_id, version):
     check_assertion(VersionExists(hub_id, dataset_id, version))
     dataset_details = fetch_view(DetailDataset(hub_id, dataset_id))
-    details = fetch_view(DetailVersion(hub_id, dataset_id, version))
+    details = fetch_view(DetailVersion(hub_id, dataset_id, version, with_partitions=False))
     return flask.render_template('versions/detail.html.j2',
                                  hub_id=hub_id,
                                  dataset_id=dataset_id,
@@ -131,7 +132,7 @@ def detail_html(hub_id, dataset_id, version):
 @bp.route('/<int:version>/dependencies.html', methods=['GET'])
 def dependencies_html(hub_id, dataset_id, version):
     check_assertion(VersionExists(hub_id, dataset_id, version))
-    details = fetch_view(DetailVersion(hub_id, dataset_id, version))
+    details = fetch_view(DetailVersion(hub_id, dataset_id, version, with_partitions=False))
     return flask.render_template('versions/dependencies.html.j2',
                                  hub_id=hub_id,
                                  dataset_id=dataset_id,
@@ -143,7 +144,7 @@ def dependencies_html(hub_id, dataset_id, version):
 @bp.route('/<int:version>/clone.html', methods=['GET'])
 def clone_html(hub_id, dataset_id, version):
     check_assertion(VersionExists(hub_id, dataset_id, version))
-    details = fetch_view(DetailVersion(hub_id, dataset_id, version))
+    details = fetch_view(DetailVersion(hub_id, dataset_id, version, with_partitions=False))
     published = fetch_view(PublishedVersions())
     dataset_name = fetch_view(DetailDataset(hub_id, dataset_id))['name']
     return flask.render_template('versions/new.html.j2',
@@ -180,7 +181,8 @@ def verify_json(hub_id, dataset_id, version):
     queue_id = enqueue_job(backend_id, 'verify_partitions', {
         'hub_id': str(hub_id),
         'dataset_id': str(dataset_id),
-        'version': str(version)
+        'version': str(version),
+        'count_rows': flask.request.args.get('count_rows') == 'true',
     })
     return flask.jsonify({'queue_id': queue_id})
 
@@ -205,7 +207,8 @@ def discover_json(hub_id, dataset_id, version):
     queue_id = enqueue_job(backend_id, 'discover_partitions', {
         'hub_id': str(hub_id),
         'dataset_id': str(dataset_id),
-        'version': str(version)
+        'version': str(version),
+        'full': flask.request.args.get('full') == 'true',
     })
     return flask.jsonify({'queue_id': queue_id})
 
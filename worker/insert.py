@@ -4,14 +4,14 @@ import pq
 import psycopg2 as psql
 import psycopg2.extras
 
-from core.job import Job
+from core.job import Job, QUEUE_NAME
 
 psql.extras.register_uuid()
 
 
 def main(hub_id, dataset_id, version):
     conn = psql.connect('')
-    queue = pq.PQ(conn=conn)['jobs']
+    queue = pq.PQ(conn=conn)[QUEUE_NAME]
 
     queue.put(
         Job(1, 'verify_partitions', {
@@ -1,16 +1,29 @@
+import argparse
+import concurrent.futures as cf
 import importlib
+import select
+import threading
 import time
 
 import pq
 import psycopg2 as psql
 import psycopg2.extras
 
-from core.engine import logging
+from core.engine import cache, logging
 from core.engine.views import ListBackends
-from core.job import Job
+from core.job import Job, QUEUE_NAME
+
+WAKEUP_TIMEOUT = 60
+
+Executors = {
+    'thread': cf.ThreadPoolExecutor,
+    'process': cf.ProcessPoolExecutor,
+}
 
 psql.extras.register_uuid()
 
+executor_state = threading.local()
+
 
 def load_backends(cursor):
     return {
@@ -19,6 +32,19 @@ def load_backends(cursor):
     }
 
 
+def listen(conn):
+    cursor = conn.cursor()
+    cursor.execute(f'LISTEN {QUEUE_NAME}')
+    conn.commit()
+
+
+def wait_for_jobs(conn, timeout):
+    if not conn.notifies:
+        select.select([conn], [], [], timeout)
+    conn.poll()
+    conn.notifies.clear()
+
+
 def run_job(cursor, backend, job):
     start_time = time.time()
     logging.info('start_job',
@@ -36,28 +62,68 @@ def run_job(cursor, backend, job):
                  **job.config)
 
 
-def main():
+def init_executor():
     logging.configure()
+    executor_state.conn = psql.connect('')
+    executor_state.backends = load_backends(executor_state.conn.cursor())
+    executor_state.conn.commit()
 
-    conn = psql.connect('')
-    queue = pq.PQ(conn=conn)['jobs']
 
-    backends = load_backends(conn.cursor())
+def execute_job(job_data):
+    conn = executor_state.conn
+    job = Job(**job_data)
+
+    try:
+        cursor = conn.cursor()
+        run_job(cursor, executor_state.backends[job.backend_id], job)
+        cache.flush(cursor)
+        conn.commit()
+    except Exception:
+        cache.discard(conn)
+        conn.rollback()
+        raise
+
 
-    for job_entry in queue:
+def dispatch(conn, queue, executor, concurrency):
+    slots = threading.BoundedSemaphore(concurrency)
+
+    def complete_job(job_entry, future):
+        slots.release()
+        if future.exception() is not None:
+            logging.warn('failed_job', job_id=job_entry.id, error=repr(future.exception()), **job_entry.data)
+
+    while True:
+        slots.acquire()
+        job_entry = queue.get(block=False)
         if job_entry is None:
-            time.sleep(2)
+            slots.release()
+            wait_for_jobs(conn, WAKEUP_TIMEOUT)
             continue
 
-        job = Job(**job_entry.data)
-        backend = backends[job.backend_id]
+        future = executor.submit(execute_job, job_entry.data)
+        future.add_done_callback(lambda f, job_entry=job_entry: complete_job(job_entry, f))
 
-        run_job(conn.cursor(), backend, job)
-        conn.commit()
+
+def main(concurrency, executor_kind):
+    logging.configure()
+
+    conn = psql.connect('')
+    queue = pq.PQ(conn=conn)[QUEUE_NAME]
+    listen(conn)
+
+    with Executors[executor_kind](max_workers=concurrency, initializer=init_executor) as executor:
+        dispatch(conn, queue, executor, concurrency)
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--executor', choices=list(Executors), default='thread')
+
+    args = parser.parse_args()
+
     try:
-        main()
+        main(args.concurrency, args.executor)
     except KeyboardInterrupt:
         print('\nstopping worker')